@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+"""
+    batch.py runs --exts-update for many easyconfigs with a process pool.
+    Workers share the on-disk metadata cache and Bioconductor snapshots, each
+    worker writes the .update file for its easyconfig. A summary of updated,
+    added and failed extensions is printed at the end.
+"""
+
+import io
+import os
+import re
+import glob
+import logging
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import metadata_cache
+import network
+import pypi_mirror
+import marker
+import pypi_simple
+import profiler
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+
+def collect_easyconfigs(source):
+    """ source is a directory (every .eb below it), a glob pattern, or a
+    text file with one easyconfig per line
+    """
+    if os.path.isdir(source):
+        easyconfigs = glob.glob(os.path.join(source, '**', '*.eb'), recursive=True)
+    elif any(char in source for char in '*?['):
+        easyconfigs = glob.glob(os.path.expanduser(source), recursive=True)
+    elif os.path.isfile(source) and not source.endswith('.eb'):
+        with open(source, 'r') as f:
+            easyconfigs = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    else:
+        easyconfigs = [source]
+    return sorted(os.path.abspath(os.path.expanduser(ec)) for ec in easyconfigs)
+
+
+def init_worker(cache_dir, enabled, refresh, fixtures=None, profile=False, http=None, pypi_api='simple',
+                mirror=None, python_versions=None):
+    metadata_cache.configure(cache_dir=cache_dir, enabled=enabled, refresh=refresh)
+    if http:
+        network.configure(*http)
+    pypi_simple.configure(pypi_api)
+    pypi_mirror.configure(mirror)
+    marker.configure(python_versions)
+    if fixtures:
+        from fixtures import FixtureStore
+        metadata_cache.set_fixtures(FixtureStore(*fixtures))
+    if profile:
+        profiler.enable()
+
+
+def update_easyconfig(easyconfig, verbose, jobs, cran_index):
+    """ run --exts-update for one easyconfig in a worker process.
+    Output is captured and returned with the counters of the update.
+    """
+    from framework import FrameWork
+    from updateR import UpdateR
+    from updatePython import UpdatePython
+
+    result = {'easyconfig': easyconfig, 'status': 'ok', 'language': None,
+              'updated': 0, 'new': 0, 'failed': 0, 'error': None}
+    output = io.StringIO()
+    # the log handler of easy_update writes to the stdout the worker inherited,
+    # log messages are captured with the output of the easyconfig instead
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    handler = logging.StreamHandler(output)
+    if handlers:
+        handler.setFormatter(handlers[0].formatter)
+    root.handlers = [handler]
+    eb = None
+    try:
+        with contextlib.redirect_stdout(output):
+            eb = FrameWork(easyconfig, verbose, False)
+            result['language'] = eb.language
+            if eb.language == 'R':
+                update = UpdateR(easyconfig, 'update', verbose, eb, jobs, cran_index)
+            elif eb.language == 'Python':
+                update = UpdatePython(easyconfig, 'update', verbose, eb, jobs)
+            else:
+                update = None
+                result['status'] = 'skipped'
+        if update:
+            result['updated'] = update.pkg_updated
+            result['new'] = update.pkg_new
+            result['failed'] = update.pkg_failed
+    except SystemExit as err:
+        result['status'] = 'failed'
+        result['error'] = f'exit {err.code}'
+    except Exception as err:
+        result['status'] = 'failed'
+        result['error'] = f'{type(err).__name__}: {err}'
+    finally:
+        root.handlers = handlers
+        if eb is not None and eb.out:
+            eb.out.close()
+    result['output'] = output.getvalue()
+    if profiler.get_profiler():
+        result['profile'] = profiler.get_profiler().take()
+    return result
+
+
+def prepare_shared_data(easyconfigs, verbose, cran_index):
+    """ load the Bioconductor versions and CRAN index used by the easyconfigs once,
+    so the workers find them in the snapshot store and metadata cache. Forked
+    workers also inherit the loaded instances
+    """
+    biocvers = set()
+    needs_cran = False
+    for easyconfig in easyconfigs:
+        try:
+            with open(easyconfig, 'r') as f:
+                code = f.read()
+        except IOError:
+            continue
+        match = re.search(r'^local_biocver\s*=\s*[\'"]?([0-9.]+)', code, re.M)
+        if match:
+            biocvers.add(match.group(1))
+        if 'RPackage' in code:
+            needs_cran = True
+    if biocvers:
+        from bioconductor_packages import get_bioconductor
+        for biocver in sorted(biocvers):
+            get_bioconductor(biocver, verbose, archive_checks=False)
+    if needs_cran and cran_index:
+        from cran_packages import get_cran_index
+        get_cran_index(cran_index, verbose)
+
+
+def run_batch(source, verbose, jobs=1, cran_index=None, processes=None):
+    """ update every easyconfig from source, return the number of failures """
+    easyconfigs = collect_easyconfigs(source)
+    if not easyconfigs:
+        print(f"== no easyconfigs found in {source}")
+        return 1
+    processes = processes or os.cpu_count()
+    print(f"== Updating {len(easyconfigs)} easyconfigs with {processes} processes")
+    prepare_shared_data(easyconfigs, verbose, cran_index)
+    cache = metadata_cache.get_cache()
+    fixtures = metadata_cache.get_fixtures()
+    results = {}
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                             initargs=(cache.cache_dir, cache.enabled, cache.refresh,
+                                       fixtures.settings() if fixtures else None,
+                                       profiler.get_profiler() is not None, network.settings(),
+                                       pypi_simple.get_api(), pypi_mirror.get_location(),
+                                       marker.get_python_versions())) as pool:
+        futures = {pool.submit(update_easyconfig, ec, verbose, jobs, cran_index): ec
+                   for ec in easyconfigs}
+        for counter, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results[result['easyconfig']] = result
+            if 'profile' in result:
+                profiler.get_profiler().merge(result.pop('profile'))
+            print(f"[{len(easyconfigs)}, {counter}] {result['status']:>7} {os.path.basename(result['easyconfig'])}",
+                  flush=True)
+    return print_summary([results[ec] for ec in easyconfigs], verbose)
+
+
+def print_summary(results, verbose):
+    totals = {'updated': 0, 'new': 0, 'failed': 0}
+    failed = 0
+    print(f"{'easyconfig':60} {'status':>8} {'updated':>8} {'new':>5} {'failed':>7}")
+    for result in results:
+        # the output of a failed easyconfig has its error messages
+        if result['output'] and (verbose or result['status'] == 'failed'):
+            print(result['output'], end='')
+        name = os.path.basename(result['easyconfig'])
+        print(f"{name:60} {result['status']:>8} {result['updated']:>8} {result['new']:>5} {result['failed']:>7}")
+        if result['error']:
+            print(f"    {result['error']}")
+        if result['status'] == 'failed':
+            failed += 1
+        for key in totals:
+            totals[key] += result[key]
+    print(f"== Easyconfigs: {len(results)}  failed: {failed}")
+    print(f"== Updated extensions: {totals['updated']}")
+    print(f"== Added extensions: {totals['new']}")
+    print(f"== Extensions not found: {totals['failed']}")
+    return failed
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""
+    bench_dcf.py compares dcf.parse_packages with the regular expression
+    PACKAGES parser it replaced. The output of both parsers must be identical.
+
+    Usage:
+        bench_dcf.py [--packages <PACKAGES file>] [--stanzas N] [--repeat N]
+
+    Without --packages a synthetic PACKAGES file shaped like the Bioconductor
+    Annotation view is generated.
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import dcf  # noqa: E402
+
+
+def legacy_parse_packages(content):
+    """ PACKAGES parser from bioconductor_packages.py before dcf.py """
+    packages_data = {}
+    packages = content.split('\n\n')
+    for package in packages:
+        current_key = None
+        current_value = []
+        lines = package.splitlines()
+
+        # Initialize a dictionary for this package
+        package_info = {}
+        for line in lines:
+            match = re.match(r'^([A-Za-z0-9]+):\s*(.*)', line)
+
+            if match:
+                if match.group(1) == 'Package':
+                    package_name = match.group(2)
+                    package_info['Package'] = package_name
+                    continue
+                elif match.group(1) == 'Version':
+                    package_info['Version'] = match.group(2)
+                    continue
+                # Save the previous field
+                elif current_key:
+                    package_info[current_key] = ' '.join(current_value).strip()
+                current_key = match.group(1)
+                current_value = [match.group(2)]
+            elif line.startswith(' ') and current_key:
+                # Continuation of previous field
+                current_value.append(line.strip())
+                continue
+        # fix 'Imports', 'Depends', 'Suggests', 'Enhances', 'LinkingTo', 'Depends_list'
+        for key in ['Imports', 'Depends', 'LinkingTo']:
+            if key in package_info:
+                package_info[key] = legacy_parse_dependency_list(package_info[key])
+        packages_data[package_name] = package_info
+    return packages_data
+
+
+def legacy_parse_dependency_list(dependency_string):
+    """ dependency parser from bioconductor_packages.py before dcf.py """
+    if not dependency_string:
+        return []
+    result = []
+    deps = re.findall(r'([^,]+(?:\([^)]*\))?)', dependency_string)
+    for dep in deps:
+        dep = dep.strip()
+        if not dep:
+            continue
+        version_match = re.match(r'([A-Za-z0-9.]+)\s*(\([^)]+\))?', dep)
+        if version_match:
+            dep_name = version_match.group(1).strip()
+            dep_version = version_match.group(2)
+            dep_info = {'name': dep_name}
+            if dep_version:
+                dep_version = dep_version.strip('()')
+                dep_info['version'] = dep_version
+            result.append(dep_info)
+    return result
+
+
+def synthetic_packages(stanzas, seed=1):
+    """ PACKAGES text with Depends/Imports/LinkingTo, continuation lines and
+    fields the parser ignores
+    """
+    rng = random.Random(seed)
+    names = [f"pkg{i}.{rng.choice(['db', 'data', 'hg38', 'mm10'])}" for i in range(stanzas)]
+    out = []
+    for i, name in enumerate(names):
+        deps = rng.sample(names[:max(i, 1)], min(i, rng.randint(0, 12)))
+        dep_strs = [f"{d} (>= {rng.randint(0, 3)}.{rng.randint(0, 40)}.0)" if rng.random() < 0.5 else d
+                    for d in deps]
+        lines = [f"Package: {name}", f"Version: {rng.randint(0, 3)}.{rng.randint(0, 40)}.{rng.randint(0, 9)}"]
+        lines.append("Depends: R (>= 4.1.0), methods" + ''.join(f", {d}" for d in dep_strs[:3]))
+        if len(dep_strs) > 3:
+            imports = ', '.join(dep_strs[3:])
+            lines.append("Imports: " + imports[:60])
+            rest = imports[60:]
+            while rest:
+                lines.append("        " + rest[:60])
+                rest = rest[60:]
+        if rng.random() < 0.2:
+            lines.append("LinkingTo: Rcpp, BH (>= 1.81)")
+        lines.append("Suggests: knitr, rmarkdown, testthat (>= 3.0.0)")
+        lines.append("License: Artistic-2.0")
+        lines.append(f"MD5sum: {rng.getrandbits(128):032x}")
+        lines.append("NeedsCompilation: no")
+        out.append('\n'.join(lines))
+    return '\n\n'.join(out) + '\n'
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PACKAGES (DCF) parser')
+    parser.add_argument('--packages', help='PACKAGES file to parse')
+    parser.add_argument('--stanzas', type=int, default=5000, help='synthetic stanzas (default: 5000)')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs (default: 5)')
+    args = parser.parse_args()
+
+    if args.packages:
+        with open(args.packages, 'r') as f:
+            content = f.read()
+    else:
+        content = synthetic_packages(args.stanzas)
+
+    legacy_time, legacy = best_of(args.repeat, legacy_parse_packages, content)
+    dcf_time, streamed = best_of(args.repeat, dcf.parse_packages, io.StringIO(content).readlines())
+    print(f"packages: {len(legacy)}  size: {len(content) / 1024:.0f} KiB")
+    print(f"regex parser:     {legacy_time * 1000:8.1f} ms")
+    print(f"streaming parser: {dcf_time * 1000:8.1f} ms  ({legacy_time / dcf_time:.1f}x)")
+    if streamed != legacy:
+        for name in legacy:
+            if streamed.get(name) != legacy[name]:
+                print(f"MISMATCH {name}:\n  regex:  {legacy[name]}\n  stream: {streamed.get(name)}")
+                break
+        sys.exit(1)
+    print("output identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+    bench_e2e.py runs easy_update.py operations on generated R, Python and
+    Bioconductor bundles against fake_index.py and reports wall time, the
+    number of requests, bytes received and peak RSS of each run.
+
+    Usage:
+        bench_e2e.py [--sizes 100,1000,5000] [--languages python,r,bioc]
+                     [--operations update,annotate,dep_graph,description]
+                     [--latency ms] [--error-rate fraction] [--jobs N] [--pypi-api simple|json]
+                     [--pypi-mirror] [--json file]
+
+    Every operation is run twice: 'cold' with an empty metadata cache and
+    'warm' with the cache left by the cold run. The output of each run is kept
+    in <workdir>/logs. The index runs in its own process, peak RSS of a child
+    includes the memory of the process it was started from. With --pypi-mirror
+    Python bundles read the projects from a local mirror in <workdir>/mirror.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_index  # noqa: E402
+
+EASY_UPDATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'easy_update.py')
+FAKE_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_index.py')
+OPERATIONS = {'update': '--exts-update', 'annotate': '--exts-annotate',
+              'dep_graph': '--exts-dep-graph', 'description': '--exts-description'}
+
+
+def run(command, env, log_path):
+    """ returns (exit status, seconds, peak RSS bytes) """
+    with open(log_path, 'w') as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, elapsed, rusage.ru_maxrss * 1024
+
+
+def start_index(args, workdir):
+    """ start fake_index.py, return (process, base URL) once it is serving """
+    command = [sys.executable, FAKE_INDEX, '--workdir', workdir, '--sizes', args.sizes, '--port', '0',
+               '--latency', str(args.latency), '--error-rate', str(args.error_rate)]
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    for line in proc.stdout:
+        if line.startswith('serving on '):
+            return proc, line.split()[-1]
+    sys.exit(f'fake_index.py exited with status {proc.wait()}')
+
+
+def index_stats(base_url):
+    """ request counters of the index since the last call """
+    with urllib.request.urlopen(base_url + fake_index.STATS_PATH) as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End to end benchmark of easy_update.py')
+    parser.add_argument('--sizes', default='100,1000,5000', help='bundle sizes (default: 100,1000,5000)')
+    parser.add_argument('--languages', default='python,r,bioc', help='bundles (default: python,r,bioc)')
+    parser.add_argument('--operations', default=','.join(OPERATIONS),
+                        help=f"operations (default: {','.join(OPERATIONS)})")
+    parser.add_argument('--latency', type=float, default=0, help='ms added to each response (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='fraction of requests answered with 503 (default: 0)')
+    parser.add_argument('--jobs', type=int, default=1, help='easy_update.py --jobs (default: 1)')
+    parser.add_argument('--pypi-api', default='simple',
+                        help="easy_update.py --pypi-api, compare 'simple' with 'json' (default: simple)")
+    parser.add_argument('--pypi-mirror', action='store_true',
+                        help='write the PyPI projects to a local mirror and use easy_update.py --pypi-mirror')
+    parser.add_argument('--workdir', default=None, help='keep easyconfigs, cache and logs in workdir')
+    parser.add_argument('--json', default=None, help='write the results to a JSON file')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_e2e.')
+    os.makedirs(os.path.join(workdir, 'logs'), exist_ok=True)
+    index, base_url = start_index(args, workdir)
+    env = dict(os.environ, EBROOTEASYBUILD=os.path.join(workdir, 'ebroot'))
+    env.update(fake_index.client_env(base_url))
+    cache_dir = os.path.join(workdir, 'cache')
+    mirror = []
+    if args.pypi_mirror:
+        fake_index.write_mirror(fake_index.Catalog(max(sizes)), os.path.join(workdir, 'mirror'))
+        mirror = ['--pypi-mirror', os.path.join(workdir, 'mirror')]
+
+    results = []
+    print(f"{'bundle':8} {'exts':>6} {'operation':12} {'cache':5} {'status':>6} {'seconds':>8} "
+          f"{'requests':>8} {'MiB recv':>8} {'peak MiB':>8}")
+    try:
+        for language in args.languages.split(','):
+            for size in sizes:
+                easyconfig = fake_index.bundle_path(workdir, language, size)
+                for operation in args.operations.split(','):
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                    for cache in ('cold', 'warm'):
+                        command = [sys.executable, EASY_UPDATE, '--no-server', '--cache-dir', cache_dir,
+                                   '--jobs', str(args.jobs), '--pypi-api', args.pypi_api] + mirror + \
+                                  [OPERATIONS[operation], easyconfig]
+                        log_path = os.path.join(workdir, 'logs', f'{language}-{size}-{operation}-{cache}.log')
+                        index_stats(base_url)
+                        status, elapsed, rss = run(command, env, log_path)
+                        stats = index_stats(base_url)
+                        result = {'language': language, 'size': size, 'operation': operation, 'cache': cache,
+                                  'status': status, 'seconds': round(elapsed, 3),
+                                  'requests': stats['requests'], 'bytes': stats['bytes'], 'peak_rss': rss}
+                        results.append(result)
+                        print(f"{language:8} {size:6} {operation:12} {cache:5} {status:6} {elapsed:8.2f} "
+                              f"{sum(stats['requests'].values()):8} {stats['bytes'] / 2**20:8.1f} "
+                              f"{rss / 2**20:8.1f}", flush=True)
+    finally:
+        index.terminate()
+        index.wait()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency_ms': args.latency, 'error_rate': args.error_rate, 'jobs': args.jobs,
+                       'pypi_api': args.pypi_api, 'pypi_mirror': args.pypi_mirror, 'results': results},
+                      f, indent=2)
+    print(f"logs in {os.path.join(workdir, 'logs')}")
+
+
+if __name__ == '__main__':
+    main()
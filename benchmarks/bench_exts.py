@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+    bench_exts.py times UpdateExts.updateexts on synthetic exts_lists of
+    increasing size. Package metadata is generated in memory, no requests are
+    made. With hash indexed bookkeeping the time per extension stays flat as
+    the exts_list grows.
+
+    Usage:
+        bench_exts.py [--sizes 1000,2000,5000,10000] [--repeat N] [--memory]
+
+    Each package requires up to three packages earlier in the list and one in
+    twenty requires a package that is not in the list, which is added.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from updateexts import UpdateExts  # noqa: E402
+
+
+class SyntheticEasyconfig:
+    """ the FrameWork attributes used by UpdateExts """
+    def __init__(self, exts_list, dep_exts):
+        self.language = 'Python'
+        self.name = 'SyntheticBundle'
+        self.version = '1.0'
+        self.exts_list = exts_list
+        self.dep_exts = dep_exts
+
+
+class SyntheticUpdate(UpdateExts):
+    """ answers get_package_info from a generated catalog """
+    def __init__(self, eb, catalog):
+        self.catalog = catalog
+        self.depend_exclude = ['python']
+        self.exts_processed_normalized = set()
+        UpdateExts.__init__(self, False, eb)
+
+    def normalize_name(self, name):
+        return name.lower()
+
+    def check_download_filename(self, pkg):
+        pass
+
+    def get_package_info(self, pkg):
+        info = self.catalog.get(pkg['name'])
+        if info is None:
+            return 'not found'
+        # PyPI sized info blob, as get_package_info copies it into meta
+        pkg['meta'].update(info['info'])
+        pkg['meta']['requires'] = [[dep, 'requires'] for dep in info['requires']]
+        pkg['meta']['description'] = info['info']['summary']
+        if info['version'] != pkg['version']:
+            pkg['orig_version'] = pkg['version']
+            pkg['version'] = info['version']
+        else:
+            pkg['orig_version'] = None
+        return 'ok'
+
+
+def synthetic_bundle(size, seed=1):
+    """ exts_list, dep_exts and catalog for size extensions """
+    rng = random.Random(seed)
+    names = [f'pkg{i:05d}' for i in range(size)]
+    dep_exts = [[f'dep{i:04d}', '1.0'] for i in range(max(size // 50, 1))]
+    catalog = {}
+    exts_list = []
+    for i, name in enumerate(names):
+        requires = [names[j] for j in rng.sample(range(i), min(i, 3))]
+        if rng.random() < 0.05:
+            extra = f'extra{i:05d}'
+            requires.append(extra)
+            catalog[extra] = {'version': '0.1', 'requires': [], 'info': package_info(extra)}
+        if rng.random() < 0.02:
+            requires.append(rng.choice(dep_exts)[0])
+        version = '1.0' if rng.random() < 0.5 else '2.0'
+        catalog[name] = {'version': '2.0', 'requires': requires, 'info': package_info(name)}
+        exts_list.append((name, version))
+    return exts_list, dep_exts, catalog
+
+
+def package_info(name):
+    info = {key: f'{key} of {name}' for key in ('author', 'author_email', 'home_page', 'license',
+                                                 'maintainer', 'project_url', 'release_url')}
+    info['summary'] = f'synthetic package {name}'
+    info['description'] = 'x' * 2000
+    info['classifiers'] = [f'Topic :: Synthetic :: {i}' for i in range(20)]
+    return info
+
+
+def run(size, repeat):
+    exts_list, dep_exts, catalog = synthetic_bundle(size)
+    best = None
+    for _ in range(repeat):
+        update = SyntheticUpdate(SyntheticEasyconfig(exts_list, dep_exts), catalog)
+        start = time.perf_counter()
+        update.updateexts()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, update
+
+
+def retained_bytes(size):
+    """ memory held by exts_processed after an update """
+    exts_list, dep_exts, catalog = synthetic_bundle(size)
+    update = SyntheticUpdate(SyntheticEasyconfig(exts_list, dep_exts), catalog)
+    tracemalloc.start()
+    update.updateexts()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size for stat in snapshot.statistics('filename')), len(update.exts_processed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark UpdateExts bookkeeping')
+    parser.add_argument('--sizes', default='1000,2000,5000,10000',
+                        help='comma separated exts_list sizes (default: 1000,2000,5000,10000)')
+    parser.add_argument('--repeat', type=int, default=3, help='best of N runs (default: 3)')
+    parser.add_argument('--memory', action='store_true', help='report memory held by exts_processed')
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, 'w')
+    print(f"{'exts':>8} {'processed':>10} {'seconds':>9} {'us/ext':>8}")
+    for size in [int(size) for size in args.sizes.split(',')]:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            elapsed, update = run(size, args.repeat)
+        finally:
+            sys.stdout = stdout
+        print(f"{size:8} {len(update.exts_processed):10} {elapsed:9.3f} {elapsed / size * 1e6:8.1f}")
+    if args.memory:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            size, count = retained_bytes(size)
+        finally:
+            sys.stdout = stdout
+        print(f"memory allocated during update: {size / 2**20:.1f} MiB for {count} records")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+"""
+    bench_micro.py times the parsing and rewriting hot paths on generated
+    input of increasing size, without network access:
+
+        parse_eb             FrameWork.parse_eb of an easyconfig with n extensions
+        print_update         FrameWork.print_update of n exts_list entries
+        parse_packages       Bioconductor_packages.parse_packages of a PACKAGES file with n packages
+        parse_dependency_list  Bioconductor_packages.parse_dependency_list of n dependencies
+        pypi_requires_dist   UpdatePython.pypi_requires_dist of n requirements
+        pypi_json            pypi_json.load_project of a PyPI project document with n releases
+        is_processed         UpdateExts.is_processed for n packages against n processed packages
+
+    The slope of log(time) over log(n) is the growth rate: about 1 for linear,
+    2 for quadratic. --save writes the results as a baseline, --baseline compares
+    with one and exits with status 1 when a case is slower than the baseline by
+    more than --threshold or grows faster.
+
+    Usage:
+        bench_micro.py [--sizes 100,300,1000,3000,10000] [--cases name,...] [--repeat N]
+                       [--save baseline.json] [--baseline baseline.json] [--threshold 0.25]
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import timeit
+import logging
+import argparse
+import platform
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import fake_index  # noqa: E402
+import metadata_cache  # noqa: E402
+from bench_exts import SyntheticEasyconfig, SyntheticUpdate  # noqa: E402
+
+SLOPE_MARGIN = 0.25     # growth rate over the baseline slope that is reported
+
+
+def synthetic_easyconfig(directory, size):
+    """ path of a Python bundle easyconfig with size extensions """
+    exts = [(f'pkg{i:05d}', '1.0', True) for i in range(size)]
+    return fake_index.write_easyconfig(directory, 'PyBundle-micro', str(size), 'foss-2023a', 'PythonBundle',
+                                       exts, dependencies=[('Python', fake_index.PYTHON_VERSION)])
+
+
+def new_framework():
+    """ FrameWork without reading an easyconfig """
+    from framework import FrameWork
+    eb = FrameWork.__new__(FrameWork)
+    if FrameWork.eb_globals is None:
+        FrameWork.eb_globals = eb.build_eb_globals()
+    eb.easyconfig = 'micro.eb'
+    eb.indent = ' ' * 4
+    return eb
+
+
+def case_parse_eb(size, directory):
+    path = synthetic_easyconfig(directory, size)
+    eb = new_framework()
+    return lambda: eb.parse_eb(path, primary=True)
+
+
+def case_print_update(size, directory):
+    eb = new_framework()
+    with open(synthetic_easyconfig(directory, size)) as f:
+        eb.code = f.read()
+    records = []
+    for i in range(size):
+        if i % 10 == 0:
+            records.append({'name': f'added{i:05d}', 'version': '1.0', 'action': 'add'})
+        if i % 2:
+            records.append({'name': f'pkg{i:05d}', 'version': '1.0', 'action': 'keep'})
+        else:
+            records.append({'name': f'pkg{i:05d}', 'version': '2.0', 'action': 'update'})
+
+    def print_update():
+        eb.out = io.StringIO()
+        eb.print_update('Python', records)
+    return print_update
+
+
+def case_parse_packages(size, directory):
+    from bioconductor_packages import Bioconductor_packages
+    bioc = Bioconductor_packages(None, False)
+    names = [f'BiocMicro{i:05d}' for i in range(size)]
+    packages = [fake_index.bioc_package(name, names[max(i - 4, 0):i]) for i, name in enumerate(names)]
+    content = fake_index.packages_dcf(packages).decode('utf-8')
+    return lambda: bioc.parse_packages('Software', content)
+
+
+def case_parse_dependency_list(size, directory):
+    from bioconductor_packages import Bioconductor_packages
+    bioc = Bioconductor_packages(None, False)
+    dependencies = ', '.join(f'pkg{i:05d} (>= 1.{i % 10})' if i % 2 else f'pkg{i:05d}' for i in range(size))
+    return lambda: bioc.parse_dependency_list(dependencies)
+
+
+def case_pypi_requires_dist(size, directory):
+    from updatePython import UpdatePython
+    update = UpdatePython.__new__(UpdatePython)
+    update.version_specific = {}
+    update.set_python_versions('3.11')
+    # requirement strings repeat across packages, as they do on PyPI
+    requires = []
+    for i in range(size):
+        requirement = f'pkg{i % 500:03d}>=1.{i % 7}'
+        if i % 3 == 1:
+            requirement += "; extra == 'test'"
+        elif i % 3 == 2:
+            requirement += "; python_version < '3.8'"
+        requires.append(requirement)
+    return lambda: update.pypi_requires_dist('micro', requires)
+
+
+def case_pypi_json(size, directory):
+    import pypi_json
+    releases = [f'1.{i}' for i in range(size)]
+    project = fake_index.pypi_project('micro', ['pkg000>=1.0'])
+    content = json.dumps(fake_index.pypi_json(project, releases[-1], releases)).encode('utf-8')
+    return lambda: pypi_json.load_project(content)
+
+
+def case_is_processed(size, directory):
+    dep_exts = [[f'dep{i:05d}', '1.0'] for i in range(size)]
+    update = SyntheticUpdate(SyntheticEasyconfig([], dep_exts), {})
+    update.exts_processed_normalized.update(f'pkg{i:05d}' for i in range(size))
+    # half of the packages are known, 'from' is set so counters are not changed
+    packages = [{'name': f'pkg{i:05d}' if i % 2 else f'new{i:05d}', 'from': 'micro'} for i in range(size)]
+
+    def is_processed():
+        for pkg in packages:
+            update.is_processed(pkg)
+    return is_processed
+
+
+CASES = {'parse_eb': case_parse_eb, 'print_update': case_print_update,
+         'parse_packages': case_parse_packages, 'parse_dependency_list': case_parse_dependency_list,
+         'pypi_requires_dist': case_pypi_requires_dist, 'pypi_json': case_pypi_json,
+         'is_processed': case_is_processed}
+
+
+def measure(function, repeat):
+    """ best time of one call in seconds """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def slope(times):
+    """ least squares slope of log(seconds) over log(size) """
+    points = [(math.log(int(size)), math.log(seconds)) for size, seconds in times.items()]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def growth(value):
+    if value is None:
+        return ''
+    if value < 1.3:
+        return 'linear'
+    if value < 1.7:
+        return 'superlinear'
+    return 'quadratic'
+
+
+def compare(name, result, baseline, threshold):
+    """ list of regressions of result against the baseline of the case """
+    if name not in baseline:
+        return []
+    base = baseline[name]
+    regressions = []
+    for size, seconds in result['times'].items():
+        if size in base['times'] and seconds > base['times'][size] * (1 + threshold):
+            regressions.append(f"n={size} {seconds / base['times'][size]:.2f}x the baseline")
+    if result['slope'] is not None and base['slope'] is not None and \
+            result['slope'] > base['slope'] + SLOPE_MARGIN:
+        regressions.append(f"slope {result['slope']:.2f}, baseline {base['slope']:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing and rewriting hot paths')
+    parser.add_argument('--sizes', default='100,300,1000,3000,10000',
+                        help='comma separated input sizes (default: 100,300,1000,3000,10000)')
+    parser.add_argument('--cases', default=','.join(CASES), help=f"cases (default: {','.join(CASES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='best of N (default: 3)')
+    parser.add_argument('--save', default=None, help='write the results as a baseline JSON file')
+    parser.add_argument('--baseline', default=None, help='compare with a baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='slowdown over the baseline that is reported (default: 0.25)')
+    args = parser.parse_args()
+
+    # parse_eb must interpret the easyconfig, not read the parsed easyconfig cache
+    metadata_cache.configure(enabled=False)
+    logging.getLogger().setLevel(logging.WARNING)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['cases']
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = {}
+    regressed = False
+    print(f"{'case':22} " + ' '.join(f'{size:>9}' for size in sizes) + f" {'slope':>6}  growth")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.cases.split(','):
+            times = {}
+            for size in sizes:
+                times[str(size)] = measure(CASES[name](size, directory), args.repeat)
+            results[name] = {'times': times, 'slope': slope(times)}
+            value = results[name]['slope']
+            print(f"{name:22} " + ' '.join(f'{seconds * 1000:7.2f}ms' for seconds in times.values()) +
+                  (f" {value:6.2f}  {growth(value)}" if value is not None else ''), flush=True)
+            for regression in compare(name, results[name], baseline, args.threshold):
+                print(f"    slower than baseline: {regression}")
+                regressed = True
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.node(),
+                       'cases': results}, f, indent=2)
+        print(f"baseline written to {args.save}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+    bench_startup.py measures the startup of easy_update.py search commands.
+    Each command is run with python -X importtime; the time spent importing
+    modules (after site) and the wall time are reported and compared with a
+    budget.
+
+    Usage:
+        bench_startup.py [--package <PyPI project>] [--repeat N] [--budget ms] [--top N]
+
+    The first run warms the metadata cache, the reported numbers are the best of
+    --repeat runs answered from the cache. Exit status is 1 when the wall time,
+    less the startup of an empty interpreter, is over --budget, or a command fails.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+EASY_UPDATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'easy_update.py')
+# imports that a search command should not need
+HEAVY_MODULES = ('requests', 'urllib3', 'packaging', 'bioconductor_packages', 'framework', 'constants')
+
+
+def parse_importtime(stderr):
+    """ return {module: (self us, cumulative us, depth)} from -X importtime output """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative), depth)
+    return modules
+
+
+def run(command, env):
+    """ wall time and stderr of command, exits when the command fails: the time of
+    a failed command is not the startup of the operation
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        print(f"{' '.join(command)} failed with exit status {proc.returncode}")
+        errors = ''.join(line for line in proc.stderr.splitlines(True) if not line.startswith('import time:'))
+        if errors:
+            print(errors, end='')
+        sys.exit(1)
+    return elapsed, proc.stderr
+
+
+def best_run(command, env, repeat):
+    best = None
+    for _ in range(repeat):
+        elapsed, stderr = run(command, env)
+        if best is None or elapsed < best[0]:
+            best = (elapsed, stderr)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark easy_update.py startup')
+    parser.add_argument('--package', default='six', help='PyPI project searched (default: six)')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs (default: 5)')
+    parser.add_argument('--budget', type=float, default=100, help='startup budget in ms (default: 100)')
+    parser.add_argument('--top', type=int, default=10, help='slowest top level imports shown (default: 10)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    empty, _ = best_run([sys.executable, '-c', 'pass'], env, args.repeat)
+    print(f"empty interpreter: {empty * 1000:7.1f} ms")
+
+    commands = [('--version', [EASY_UPDATE, '--version']),
+                ('--exts-search-pypi', [EASY_UPDATE, '--exts-search-pypi', args.package])]
+    over_budget = False
+    for label, command in commands:
+        command = [sys.executable, '-X', 'importtime'] + command
+        run(command, env)    # warm the metadata cache
+        elapsed, stderr = best_run(command, env, args.repeat)
+        modules = parse_importtime(stderr)
+        names = list(modules)
+        after_site = names[names.index('site') + 1:] if 'site' in modules else names
+        top_level = {name: modules[name] for name in after_site if modules[name][2] == 0}
+        import_us = sum(cumulative for _, cumulative, _ in top_level.values())
+        startup = (elapsed - empty) * 1000
+        print(f"{label:20} wall: {elapsed * 1000:7.1f} ms  over empty: {startup:7.1f} ms  "
+              f"imports: {import_us / 1000:6.1f} ms  modules: {len(modules)}")
+        for name, (_, cumulative, _) in sorted(top_level.items(), key=lambda x: -x[1][1])[:args.top]:
+            print(f"    {name:30} {cumulative / 1000:7.1f} ms")
+        heavy = [name for name in HEAVY_MODULES if name in modules]
+        if label != '--version' and heavy:
+            print(f"    imported: {', '.join(heavy)}")
+        if startup > args.budget:
+            print(f"    over budget of {args.budget:.0f} ms")
+            over_budget = True
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
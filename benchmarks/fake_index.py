@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+
+"""
+    fake_index.py serves generated package metadata in the formats of the
+    PyPI JSON API, the PyPI Simple API with .metadata files, crandb, the
+    CRAN PACKAGES index and the Bioconductor PACKAGES/packages.json files,
+    and writes easyconfigs that use it. It is used by bench_e2e.py, and can
+    be run alone to try easy_update.py against it:
+
+        fake_index.py --workdir /tmp/fake --size 1000 --latency 20
+        eval "$(fake_index.py --workdir /tmp/fake --env)"   # in another shell
+
+    easy_update.py reads the index URLs from EASY_UPDATE_PYPI_URL,
+    EASY_UPDATE_PYPI_SIMPLE_URL, EASY_UPDATE_CRANDB_URL,
+    EASY_UPDATE_CRAN_INDEX_URL and EASY_UPDATE_BIOCONDUCTOR_URL. Use a
+    separate --cache-dir, the generated metadata must not end up in the
+    metadata cache of real runs.
+
+    Every package i depends on up to three packages before it, one in twenty
+    on a package that is not in the bundles and is added by --exts-update.
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+BIOCVER = '3.20'
+PYTHON_VERSION = '3.11.3'
+R_VERSION = '4.3.2'
+R_BASE = ['base', 'compiler', 'datasets', 'graphics', 'grDevices', 'grid', 'methods',
+          'parallel', 'splines', 'stats', 'stats4', 'tcltk', 'tools', 'utils']
+RELEASES = ['1.0', '1.1', '1.2', '1.3', '1.4', '1.5', '1.6', '2.0']
+LATEST = RELEASES[-1]
+LAST_MODIFIED = formatdate(time.mktime((2026, 10, 1, 0, 0, 0, 0, 0, 0)), usegmt=True)
+BUNDLES = {'python': 'PyBundle-synthetic', 'r': 'R-bundle-CRAN-synthetic',
+           'bioc': 'R-bundle-Bioconductor-synthetic'}
+STATS_PATH = '/_stats'      # GET returns the request counters as JSON and resets them
+
+
+class Catalog:
+    """ package metadata for bundles of up to size extensions """
+    def __init__(self, size, seed=1):
+        self.size = size
+        rng = random.Random(seed)
+        self.pypi = {}
+        self.cran = {}
+        self.bioc = {}
+        self.bioc_data = {'annotation': {}, 'experiment': {}}
+        self.archived = set()
+        self.python_names = [python_name(i) for i in range(size)]
+        self.cran_names = [f'cranext{i:05d}' for i in range(size)]
+        self.bioc_names = [f'BiocExt{i:05d}' for i in range(size)]
+        # packages installed with R and with the dependencies of the bundles
+        self.r_exts = [f'rdep{i:03d}' for i in range(50)]
+        for name in self.r_exts:
+            self.cran[name] = cran_package(name, [], [])
+
+        for i, name in enumerate(self.python_names):
+            requires = [f'{dep}>={RELEASES[0]}' for dep in sample(rng, self.python_names, i)]
+            if rng.random() < 0.05:
+                extra = f'pyextra{i:05d}'
+                self.pypi[extra] = pypi_project(extra, [])
+                requires.append(extra)
+            # requirements that do not apply to Python 3.11 without extras
+            requires.append(f"pytest; extra == 'test'")
+            if rng.random() < 0.2:
+                requires.append(f"importlib-metadata>=1.0; python_version < '3.8'")
+            self.pypi[name] = pypi_project(name, requires)
+        # distribution file names use an underscore for a dash
+        self.distributions = {name.replace('-', '_'): name for name in self.pypi}
+
+        for i, name in enumerate(self.cran_names):
+            imports = sample(rng, self.cran_names, i)
+            if rng.random() < 0.05:
+                extra = f'cranextra{i:05d}'
+                self.cran[extra] = cran_package(extra, [], [])
+                imports.append(extra)
+            if rng.random() < 0.1:
+                imports.append(rng.choice(self.r_exts))
+            self.cran[name] = cran_package(name, ['methods'], imports)
+        # archived packages are only found in crandb
+        for name in list(self.cran)[-max(size // 100, 1):]:
+            self.archived.add(name)
+
+        for i, name in enumerate(self.bioc_names):
+            imports = sample(rng, self.bioc_names, i) + sample(rng, self.cran_names, i, 2)
+            self.bioc[name] = bioc_package(name, imports)
+        for view in self.bioc_data:
+            for i in range(50):
+                name = f'{view.capitalize()}Data{i:03d}'
+                self.bioc_data[view][name] = bioc_package(name, [])
+        self.bioc_data['bioc'] = self.bioc
+
+
+def python_name(i):
+    """ one in twenty names uses a dash, the sdist file name uses an underscore """
+    return f'py-ext-{i:05d}' if i % 20 == 0 else f'pyext{i:05d}'
+
+
+def sample(rng, names, i, count=3):
+    """ up to count names from before index i """
+    return [names[j] for j in rng.sample(range(i), min(i, count))]
+
+
+def pypi_project(name, requires):
+    return {'name': name, 'requires_dist': requires}
+
+
+def cran_package(name, depends, imports):
+    return {'Package': name, 'Version': LATEST, 'Depends': depends, 'Imports': imports}
+
+
+def bioc_package(name, imports):
+    return {'Package': name, 'Version': LATEST, 'Depends': [], 'Imports': imports}
+
+
+def description(name):
+    return f'{name} is a generated package. ' + 'It is used to benchmark easy_update. ' * 40
+
+
+class Responses:
+    """ response bodies for the catalog, built on first use """
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.bodies = {}
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """ (status, body, content type) for path """
+        with self.lock:
+            if path in self.bodies:
+                return self.bodies[path]
+        response = self.build(path)
+        with self.lock:
+            self.bodies[path] = response
+        return response
+
+    def build(self, path):
+        parts = path.strip('/').split('/')
+        catalog = self.catalog
+        if parts[0] == 'pypi' and len(parts) in (3, 4) and parts[-1] == 'json':
+            project = catalog.pypi.get(parts[1])
+            if project is None or (len(parts) == 4 and parts[2] not in RELEASES):
+                return not_found()
+            version = parts[2] if len(parts) == 4 else LATEST
+            return 200, json.dumps(pypi_json(project, version)).encode('utf-8'), 'application/json'
+        if parts[0] == 'simple' and len(parts) == 2:
+            project = catalog.pypi.get(parts[1])
+            if project is None:
+                return not_found()
+            return 200, json.dumps(simple_json(project)).encode('utf-8'), 'application/vnd.pypi.simple.v1+json'
+        if parts[0] == 'files' and len(parts) == 2 and parts[1].endswith('.whl.metadata'):
+            project = catalog.pypi.get(catalog.distributions.get(parts[1].split('-')[0]))
+            if project is None:
+                return not_found()
+            return 200, core_metadata(project, parts[1].split('-')[1]), 'text/plain'
+        if parts[0] == 'crandb' and len(parts) == 2:
+            package = catalog.cran.get(parts[1])
+            if package is None:
+                return not_found()
+            return 200, json.dumps(crandb_json(package)).encode('utf-8'), 'application/json'
+        if parts[0] == 'cran' and parts[-1] in ('PACKAGES', 'PACKAGES.gz'):
+            packages = [package for name, package in catalog.cran.items() if name not in catalog.archived]
+            body = packages_dcf(packages)
+            if parts[-1] == 'PACKAGES.gz':
+                body = gzip.compress(body, mtime=0)
+            return 200, body, 'text/plain'
+        if parts[:2] == ['bioc', 'packages']:
+            return self.bioconductor(parts[2:])
+        return not_found()
+
+    def bioconductor(self, parts):
+        """ packages/<biocver>/<view>/src/contrib/PACKAGES, packages/json/<biocver>/<view>/packages.json
+        and packages/release/bioc/html/<name>.html
+        """
+        catalog = self.catalog
+        if parts[:3] == ['release', 'bioc', 'html']:
+            # removed packages with an odd number are deprecated, the others archived
+            if parts[3][-len('1.html')] in '13579':
+                return 200, b'<html>This package has been removed from Bioconductor.</html>', 'text/html'
+            return not_found()
+        if parts[0] == 'json' and parts[-1] == 'packages.json':
+            view = parts[-2]
+            if parts[1] != BIOCVER or view not in catalog.bioc_data:
+                return not_found()
+            packages = {name: dict(package, Title=f'{name} title', Description=description(name))
+                        for name, package in catalog.bioc_data[view].items()}
+            # packages.json also lists packages removed from PACKAGES
+            for i in range(5):
+                name = f'{view.capitalize()}Removed{i}'
+                packages[name] = dict(bioc_package(name, []), Title=name, Description=description(name))
+            return 200, json.dumps(packages).encode('utf-8'), 'application/json'
+        if parts[0] == BIOCVER and parts[-1] == 'PACKAGES':
+            view = parts[-4]
+            if view not in catalog.bioc_data:
+                return not_found()
+            return 200, packages_dcf(catalog.bioc_data[view].values()), 'text/plain'
+        return not_found()
+
+
+def not_found():
+    return 404, b'{"message": "Not Found"}', 'application/json'
+
+
+def pypi_json(project, version, release_names=RELEASES):
+    """ the fields of https://pypi.org/pypi/<name>/json used by easy_update, and
+    enough of the rest that documents have the size of real ones
+    """
+    name = project['name']
+    info = {'name': name, 'version': version, 'summary': f'{name} generated package',
+            'description': description(name), 'author': 'easy_update benchmarks',
+            'home_page': f'https://example.org/{name}', 'license': 'MIT',
+            'requires_python': '>=3.8', 'requires_dist': project['requires_dist'],
+            'classifiers': ['Programming Language :: Python :: 3',
+                            'Operating System :: OS Independent']}
+    releases = {}
+    for release in release_names:
+        digest = hashlib.sha256(f'{name}-{release}'.encode('utf-8')).hexdigest()
+        releases[release] = [
+            {'comment_text': '', 'digests': {'blake2b_256': digest, 'md5': digest[:32], 'sha256': digest},
+             'filename': filename, 'md5_digest': digest[:32], 'packagetype': packagetype,
+             'python_version': python_version, 'requires_python': '>=3.8', 'size': 123456,
+             'upload_time': '2026-10-01T00:00:00', 'upload_time_iso_8601': '2026-10-01T00:00:00.000000Z',
+             'url': f'https://files.example.org/packages/{digest[:2]}/{digest[2:4]}/{digest[4:]}/{filename}',
+             'yanked': False, 'yanked_reason': None, 'has_sig': False, 'downloads': -1}
+            for packagetype, python_version, filename in distribution_files(name, release)]
+    return {'info': info, 'releases': releases, 'urls': releases[version]}
+
+
+def distribution_files(name, release):
+    """ (packagetype, python_version, filename) of the files of a release """
+    filename = name.replace('-', '_')
+    return [('sdist', 'source', f'{filename}-{release}.tar.gz'),
+            ('bdist_wheel', 'py3', f'{filename}-{release}-py3-none-any.whl')]
+
+
+def simple_json(project, files_url='../../files'):
+    """ PEP 691 project page, the wheels have a PEP 658 .metadata file """
+    files = []
+    for release in RELEASES:
+        digest = hashlib.sha256(f"{project['name']}-{release}".encode('utf-8')).hexdigest()
+        for packagetype, _, filename in distribution_files(project['name'], release):
+            metadata = {'sha256': digest} if packagetype == 'bdist_wheel' else False
+            files.append({'filename': filename, 'url': f'{files_url}/{filename}', 'hashes': {'sha256': digest},
+                          'requires-python': '>=3.8', 'yanked': False, 'size': 123456,
+                          'upload-time': '2026-10-01T00:00:00.000000Z', 'core-metadata': metadata,
+                          'data-dist-info-metadata': metadata})
+    return {'meta': {'api-version': '1.1'}, 'name': project['name'], 'versions': RELEASES, 'files': files}
+
+
+def core_metadata(project, version):
+    """ METADATA of a wheel """
+    name = project['name']
+    lines = ['Metadata-Version: 2.1', f'Name: {name}', f'Version: {version}',
+             f'Summary: {name} generated package', f'Home-page: https://example.org/{name}',
+             'License: MIT', 'Requires-Python: >=3.8', 'Classifier: Programming Language :: Python :: 3',
+             'Classifier: Operating System :: OS Independent']
+    lines.extend(f'Requires-Dist: {requirement}' for requirement in project['requires_dist'])
+    return ('\n'.join(lines) + '\n\n' + description(name) + '\n').encode('utf-8')
+
+
+def crandb_json(package):
+    """ crandb.r-pkg.org/<name>: dependencies are {name: version} """
+    name = package['Package']
+    cran = {'Package': name, 'Version': package['Version'], 'Title': f'{name} title',
+            'Description': description(name), 'License': 'GPL-3',
+            'URL': f'https://example.org/{name}'}
+    cran['Depends'] = {'R': '>= 4.0'}
+    cran['Depends'].update({dep: '*' for dep in package['Depends']})
+    cran['Imports'] = {dep: '*' for dep in package['Imports']}
+    return cran
+
+
+def packages_dcf(packages):
+    """ PACKAGES file, the last field of a stanza is not read by dcf.parse_packages """
+    stanzas = []
+    for package in packages:
+        lines = [f"Package: {package['Package']}", f"Version: {package['Version']}"]
+        depends = ['R (>= 4.0)'] + package['Depends']
+        lines.append('Depends: ' + ', '.join(depends))
+        if package['Imports']:
+            lines.append('Imports: ' + ',\n        '.join(package['Imports']))
+        lines.append('License: GPL-3')
+        lines.append('NeedsCompilation: no')
+        stanzas.append('\n'.join(lines) + '\n')
+    return '\n'.join(stanzas).encode('utf-8')
+
+
+class FakeIndex(ThreadingHTTPServer):
+    """ latency: seconds added to each response
+        error_rate: fraction of requests answered with 503
+    """
+    daemon_threads = True
+
+    def __init__(self, catalog, host='127.0.0.1', port=0, latency=0, error_rate=0, seed=1):
+        super().__init__((host, port), FakeIndexHandler)
+        self.responses = Responses(catalog)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.bytes = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, source, size):
+        with self.lock:
+            self.requests[source] += 1
+            self.bytes += size
+
+    def failed(self):
+        if not self.error_rate:
+            return False
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    def reset(self):
+        """ return the counters and start new ones """
+        with self.lock:
+            stats = {'requests': dict(self.requests), 'bytes': self.bytes}
+            self.requests = Counter()
+            self.bytes = 0
+        return stats
+
+
+class FakeIndexHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, without TCP_NODELAY every response
+    # on a kept alive connection waits for the delayed ACK of the client
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        server = self.server
+        if self.path == STATS_PATH:
+            body = json.dumps(server.reset()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        source = self.path.strip('/').split('/')[0]
+        if server.failed():
+            status, body, content_type = 503, b'Service Unavailable', 'text/plain'
+        else:
+            status, body, content_type = server.responses.get(self.path)
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status in (200, 304):
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+        server.count(source, len(body) if send_body else 0)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def client_env(base_url):
+    """ environment for easy_update.py to use the fake index at base_url """
+    return {'EASY_UPDATE_PYPI_URL': f'{base_url}/pypi',
+            'EASY_UPDATE_PYPI_SIMPLE_URL': f'{base_url}/simple',
+            'EASY_UPDATE_CRANDB_URL': f'{base_url}/crandb/',
+            'EASY_UPDATE_CRAN_INDEX_URL': f'{base_url}/cran/src/contrib/PACKAGES.gz',
+            'EASY_UPDATE_BIOCONDUCTOR_URL': f'{base_url}/bioc'}
+
+
+def easyconfig_path(ec_dir, name, version, toolchain_suffix='foss-2023a'):
+    return os.path.join(ec_dir, name[0].lower(), name, f'{name}-{version}-{toolchain_suffix}.eb')
+
+
+def bundle_path(workdir, language, size):
+    """ easyconfig of the bundle of language ('python', 'r' or 'bioc') with size extensions """
+    return easyconfig_path(os.path.join(workdir, 'easyconfigs'), BUNDLES[language], str(size))
+
+
+def write_easyconfigs(catalog, workdir, sizes):
+    """ write the easyconfigs tree to <workdir>/easyconfigs and an empty EasyBuild
+    installation to <workdir>/ebroot. Returns {(language, size): easyconfig path}
+    Python and R are dependencies of the bundles; R-bundle-Bioconductor depends on
+    R-bundle-CRAN of the same size.
+    """
+    ec_dir = os.path.join(workdir, 'easyconfigs')
+    os.makedirs(os.path.join(workdir, 'ebroot', 'easybuild', 'easyconfigs'), exist_ok=True)
+    rng = random.Random(len(sizes))
+    write_easyconfig(ec_dir, 'Python', PYTHON_VERSION, 'GCCcore-12.3.0', easyblock='EB_Python',
+                     exts=[('pip', '23.1.2'), ('setuptools', '67.7.2'), ('wheel', '0.40.0')],
+                     toolchain=('GCCcore', '12.3.0'))
+    write_easyconfig(ec_dir, 'R', R_VERSION, 'foss-2023a', easyblock='EB_R',
+                     exts=R_BASE + [(name, LATEST) for name in catalog.r_exts],
+                     extra="exts_defaultclass = 'RPackage'\n")
+    easyconfigs = {}
+    for size in sizes:
+        exts = [(name, bundle_version(rng), True) for name in catalog.python_names[:size]]
+        easyconfigs[('python', size)] = write_easyconfig(
+            ec_dir, BUNDLES['python'], str(size), 'foss-2023a', easyblock='PythonBundle', exts=exts,
+            dependencies=[('Python', PYTHON_VERSION)])
+        exts = [(name, bundle_version(rng)) for name in catalog.cran_names[:size]]
+        easyconfigs[('r', size)] = write_easyconfig(
+            ec_dir, BUNDLES['r'], str(size), 'foss-2023a', easyblock='Bundle', exts=exts,
+            dependencies=[('R', R_VERSION)], extra="exts_defaultclass = 'RPackage'\n")
+        exts = [(name, bundle_version(rng)) for name in catalog.bioc_names[:size]]
+        easyconfigs[('bioc', size)] = write_easyconfig(
+            ec_dir, BUNDLES['bioc'], str(size), 'foss-2023a', easyblock='Bundle',
+            exts=exts, dependencies=[('R', R_VERSION), (BUNDLES['r'], str(size))],
+            extra=f"exts_defaultclass = 'RPackage'\nlocal_biocver = '{BIOCVER}'\n")
+    return easyconfigs
+
+
+def bundle_version(rng):
+    """ half of the extensions are out of date """
+    return RELEASES[0] if rng.random() < 0.5 else LATEST
+
+
+def write_easyconfig(ec_dir, name, version, toolchain_suffix, easyblock, exts,
+                     dependencies=(), extra='', toolchain=('foss', '2023a')):
+    path = easyconfig_path(ec_dir, name, version, toolchain_suffix)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = [f"easyblock = '{easyblock}'", '', f"name = '{name}'", f"version = '{version}'", '',
+             "homepage = 'https://example.org'", f'description = "generated {name} for benchmarks"', '',
+             f"toolchain = {{'name': '{toolchain[0]}', 'version': '{toolchain[1]}'}}", '']
+    lines.append('dependencies = [')
+    lines.extend(f'    {dep!r},' for dep in dependencies)
+    lines.extend([']', '', extra, 'exts_list = ['])
+    for ext in exts:
+        if isinstance(ext, str):
+            lines.append(f"    '{ext}',")
+        elif len(ext) == 3:
+            checksum = hashlib.sha256(f'{ext[0]}-{ext[1]}'.encode('utf-8')).hexdigest()
+            lines.append(f"    ('{ext[0]}', '{ext[1]}', {{")
+            lines.append(f"        'checksums': ['{checksum}'],")
+            lines.append('    }),')
+        else:
+            lines.append(f"    ('{ext[0]}', '{ext[1]}'),")
+    lines.extend([']', '', "moduleclass = 'tools'", ''])
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+    return path
+
+
+def write_mirror(catalog, directory):
+    """ bandersnatch style mirror of the PyPI projects in directory/web: json/<name> for
+    nine in ten projects, simple/<name>/index.v1_json and .metadata files of the latest
+    wheels for all. Returns the number of projects
+    """
+    web = os.path.join(directory, 'web')
+    os.makedirs(os.path.join(web, 'json'), exist_ok=True)
+    os.makedirs(os.path.join(web, 'packages'), exist_ok=True)
+    for i, (name, project) in enumerate(sorted(catalog.pypi.items())):
+        if i % 10:
+            with open(os.path.join(web, 'json', name), 'w') as f:
+                json.dump(pypi_json(project, LATEST), f)
+        page_dir = os.path.join(web, 'simple', name)
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, 'index.v1_json'), 'w') as f:
+            json.dump(simple_json(project, '../../packages'), f)
+        for packagetype, _, filename in distribution_files(name, LATEST):
+            if packagetype == 'bdist_wheel':
+                with open(os.path.join(web, 'packages', filename + '.metadata'), 'wb') as f:
+                    f.write(core_metadata(project, LATEST))
+    return len(catalog.pypi)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve generated PyPI, CRAN and Bioconductor metadata')
+    parser.add_argument('--workdir', required=True, help='directory for the generated easyconfigs')
+    parser.add_argument('--size', type=int, default=1000, help='extensions of the largest bundle (default: 1000)')
+    parser.add_argument('--sizes', default=None, help='comma separated bundle sizes (default: --size)')
+    parser.add_argument('--port', type=int, default=8765, help='port, 0 for any free port (default: 8765)')
+    parser.add_argument('--latency', type=float, default=0, help='ms added to each response (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='fraction of requests answered with 503 (default: 0)')
+    parser.add_argument('--env', action='store_true', help='print the environment for easy_update.py and exit')
+    parser.add_argument('--mirror', default=None, metavar='directory',
+                        help='write the PyPI projects as a local mirror for --pypi-mirror and exit')
+    args = parser.parse_args()
+
+    env = client_env(f'http://127.0.0.1:{args.port}')
+    env['EBROOTEASYBUILD'] = os.path.join(os.path.abspath(args.workdir), 'ebroot')
+    if args.env:
+        for name, value in env.items():
+            print(f'export {name}={value}')
+        return
+    sizes = [int(size) for size in (args.sizes or str(args.size)).split(',')]
+    catalog = Catalog(max(sizes))
+    if args.mirror:
+        print(f'{write_mirror(catalog, args.mirror)} projects in {args.mirror}')
+        return
+    for (language, size), path in sorted(write_easyconfigs(catalog, args.workdir, sizes).items()):
+        print(f'{language:7} {size:6} {path}')
+    server = FakeIndex(catalog, port=args.port, latency=args.latency / 1000, error_rate=args.error_rate)
+    # bench_e2e.py waits for this line
+    print(f'serving on {server.base_url}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    stats = server.reset()
+    print(f"{sum(stats['requests'].values())} requests, {stats['bytes']} bytes", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import pickle
+import logging
+import metadata_cache
+from metadata_cache import http_head
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+SNAPSHOT_FORMAT = 1
+
+
+class BiocSnapshot:
+    """
+    Store parsed Bioconductor package data on disk, one pickle file per
+    Bioconductor version and view: <cache_dir>/bioconductor/<biocver>/<view>.pickle
+
+    Each snapshot records the Last-Modified value of the PACKAGES and packages.json
+    files it was built from. A snapshot younger than the metadata cache TTL is used
+    as is, an older one is used only if upstream Last-Modified has not changed.
+    Archive verdicts from check_archive are kept in <biocver>/archive.json.
+    Snapshots are not used with --record and --replay, every Bioconductor
+    response has to go through http_get to be recorded or replayed.
+    """
+    def __init__(self, biocver):
+        cache = metadata_cache.get_cache()
+        self.enabled = cache.enabled and metadata_cache.get_fixtures() is None
+        self.refresh = cache.refresh
+        self.ttl = cache.ttl
+        self.snapshot_dir = os.path.join(cache.cache_dir, 'bioconductor', biocver)
+
+    def path(self, view):
+        return os.path.join(self.snapshot_dir, view + '.pickle')
+
+    def load(self, view):
+        """ return the bioc_data entries for view, or None if there is no valid snapshot """
+        if not self.enabled:
+            return None
+        try:
+            with open(self.path(view), 'rb') as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if snapshot.get('format') != SNAPSHOT_FORMAT:
+            return None
+        if self.refresh or time.time() - snapshot['stored'] > self.ttl:
+            if not self.is_current(snapshot['validators']):
+                logging.debug('Bioconductor snapshot %s is out of date', self.path(view))
+                return None
+            snapshot['stored'] = time.time()
+            self.write(view, snapshot)
+        return snapshot['bioc_data']
+
+    def is_current(self, validators):
+        """ compare saved Last-Modified values with upstream """
+        for url, last_modified in validators.items():
+            if last_modified is None:
+                return False
+            try:
+                response = http_head(url)
+            except Exception as err:
+                logging.debug('HEAD %s failed: %s', url, err)
+                return False
+            if response.headers.get('Last-Modified') != last_modified:
+                return False
+        return True
+
+    def save(self, view, bioc_data, validators):
+        """ bioc_data: package entries for view
+            validators: {url: Last-Modified} of the files bioc_data was parsed from
+        """
+        if not self.enabled:
+            return
+        snapshot = {'format': SNAPSHOT_FORMAT, 'stored': time.time(),
+                    'validators': validators, 'bioc_data': bioc_data}
+        self.write(view, snapshot)
+
+    def load_archive(self):
+        """ archive verdicts {package: 'package' | 'archived' | 'deprecated'} """
+        if not self.enabled:
+            return {}
+        try:
+            with open(os.path.join(self.snapshot_dir, 'archive.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_archive(self, archive_status):
+        if not self.enabled:
+            return
+        path = os.path.join(self.snapshot_dir, 'archive.json')
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump(archive_status, f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+        except OSError as err:
+            logging.warning('can not write Bioconductor archive status %s: %s', path, err)
+
+    def write(self, view, snapshot):
+        path = self.path(view)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError as err:
+            logging.warning('can not write Bioconductor snapshot %s: %s', path, err)
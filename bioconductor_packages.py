@@ -1,14 +1,25 @@
 #!/usr/bin/env python3
 
+import io
+import os
 import sys
-import requests
 import re
+import time
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor
+import metadata_cache
+from metadata_cache import http_get
+from bioc_snapshot import BiocSnapshot
+from profiler import phase
+import dcf
 
 logging.basicConfig(format='%(message)s',
                     level=logging.INFO)
 
+ARCHIVE_JOBS = 8    # concurrent requests for check_archive
+BIOCONDUCTOR_URL = os.environ.get('EASY_UPDATE_BIOCONDUCTOR_URL', 'https://bioconductor.org')
+
 
 class Bioconductor_packages:
     """
@@ -21,14 +32,22 @@ class Bioconductor_packages:
 
     function get_bioc_package(pkg) is used by updateR.py to get package metadata
     from Bioconductor.
+
+    archive_checks: check bioconductor.org for packages listed in packages.json but
+    missing from PACKAGES. The results are kept in archive_status, they are not needed
+    when only version data is used.
     """
-    def __init__(self, biocver, verbose):
+    def __init__(self, biocver, verbose, archive_checks=True):
         """Initialize Bioconductor packages with the specified version.
             if biocver is None, no Bioconductor data is loaded.
-            else check version of biocver and download the PACKAGES file
+            else check version of biocver and download the PACKAGES file.
+            Parsed data is saved as a snapshot for each view and reused by later runs.
         """
         self.verbose = verbose
+        self.archive_checks = archive_checks
         self.bioc_data = {}
+        self.validators = {}
+        self.archive_status = {}
         if biocver is None:
             return
         if biocver not in ['3.20', '3.21', '3.22', '3.23', '3.24', '3.25']:
@@ -36,19 +55,51 @@ class Bioconductor_packages:
             sys.exit(1)
         self.biocver = biocver
         source_urls = [
-            ('Software', f'https://bioconductor.org/packages/{biocver}/bioc/'),
-            ('Annotation', f'https://bioconductor.org/packages/{biocver}/data/annotation/'),
-            ('Experiment', f'https://bioconductor.org/packages/{biocver}/data/experiment/'),
+            ('Software', f'{BIOCONDUCTOR_URL}/packages/{biocver}/bioc/'),
+            ('Annotation', f'{BIOCONDUCTOR_URL}/packages/{biocver}/data/annotation/'),
+            ('Experiment', f'{BIOCONDUCTOR_URL}/packages/{biocver}/data/experiment/'),
         ]
+        snapshot = BiocSnapshot(biocver)
+        self.snapshot = snapshot
+        snapshots = {}
+        for view, url in source_urls:
+            view_data = snapshot.load(view)
+            if view_data is not None:
+                snapshots[view] = view_data
+        # download the PACKAGES and packages.json files of every view at the same time,
+        # PACKAGES is parsed in the download thread. Results are merged in view order
+        # so bioc_data is the same as loading the views one after the other.
+        start = time.time()
+        downloads = {}
+        pool = ThreadPoolExecutor(max_workers=6)
         for view, url in source_urls:
-            response = requests.get(url + 'src/contrib/PACKAGES', timeout=10)
-            if response.status_code < 200 or response.status_code > 299:
-                logging.error('get URL error: %s %s', response.status_code, url)
-                sys.exit(1)
-            self.parse_packages(view, response.text)
+            if view not in snapshots:
+                downloads[view] = (pool.submit(self.download_packages, view, url),
+                                   pool.submit(self.download_bioconductor_json, url))
+        timings = []
+        for view, url in source_urls:
+            if view in snapshots:
+                if self.verbose:
+                    print(f' == loaded Bioconductor {biocver} {view} snapshot - Package Count: {len(snapshots[view])}')
+                self.bioc_data.update(snapshots[view])
+                continue
+            packages_future, json_future = downloads[view]
+            view_packages, packages_url, packages_modified, packages_time = packages_future.result()
+            self.bioc_data.update(view_packages)
             if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
                 self.bioc_stats()
-            self.read_bioconductor_json(view, url)
+            json_data, bioc_url, json_modified, json_time = json_future.result()
+            self.merge_bioconductor_json(view, bioc_url, json_data)
+            timings.extend([(packages_url, packages_time), (bioc_url, json_time)])
+            view_data = {name: info for name, info in self.bioc_data.items() if info.get('View') == view}
+            snapshot.save(view, view_data, {packages_url: packages_modified, bioc_url: json_modified})
+        pool.shutdown()
+        if self.verbose and timings:
+            for url, elapsed in timings:
+                print(f' == {elapsed:6.2f}s {url}')
+            serial = sum(elapsed for url, elapsed in timings)
+            print(f' == Bioconductor {biocver} loaded in {time.time() - start:.2f}s '
+                  f'(downloads total {serial:.2f}s)')
 
     def get_bioc_package(self, pkg):
         """Extract Dependencies from BioCondutor json metadata
@@ -106,89 +157,37 @@ class Bioconductor_packages:
 
     def parse_packages(self, view, content):
         """
-        Parse the PACKAGES file content into a dictionary.
+        Parse the PACKAGES file content into self.bioc_data.
         Args:
             view: The type of Bioconductor package (e.g., 'Software', 'Annotation', 'Experiment').
             content: The content of the PACKAGES file as a string.
         Returns:
             None, but populates self.bioc_data with package information.
         """
-        packages = content.split('\n\n')
-        for package in packages:
-            current_key = None
-            current_value = []
-            lines = package.splitlines()
-
-            # Initialize a dictionary for this package
-            package_info = {}
-            for line in lines:
-                match = re.match(r'^([A-Za-z0-9]+):\s*(.*)', line)
-
-                if match:
-                    if match.group(1) == 'Package':
-                        package_name = match.group(2)
-                        package_info['Package'] = package_name
-                        continue
-                    elif match.group(1) == 'Version':
-                        package_info['Version'] = match.group(2)
-                        continue
-                    # Save the previous field
-                    elif current_key:
-                        package_info[current_key] = ' '.join(current_value).strip()
-                    current_key = match.group(1)
-                    current_value = [match.group(2)]
-                elif line.startswith(' ') and current_key:
-                    # Continuation of previous field
-                    current_value.append(line.strip())
-                    continue
-            # fix 'Imports', 'Depends', 'Suggests', 'Enhances', 'LinkingTo', 'Depends_list'
-            for key in ['Imports', 'Depends', 'LinkingTo']:
-                if key in package_info:
-                    package_info[key] = self.parse_dependency_list(package_info[key])
+        for package_name, package_info in dcf.parse_packages(io.StringIO(content)).items():
             package_info['View'] = view
             package_info['Status'] = 'package'
             self.bioc_data[package_name] = package_info
 
-    def parse_dependency_list(self, dependency_string):
+    def download_packages(self, view, url):
+        """ download and parse the PACKAGES file of a view
+        returns ({package: info}, PACKAGES url, Last-Modified, seconds)
         """
-        Parse a dependency string into a list of dictionaries with package names and versions.
-
-        Args:
-            dependency_string: A string like "R (>= 3.5.0), gdsfmt (>= 1.36.0), methods"
-
-        Returns:
-           List of dictionaries with keys 'name' and 'version' (if specified)
-        """
-        if not dependency_string:
-            return []
-
-        result = []
-
-        # Split by commas, but avoid splitting inside parentheses
-        deps = re.findall(r'([^,]+(?:\([^)]*\))?)', dependency_string)
-
-        for dep in deps:
-            dep = dep.strip()
-            if not dep:
-                continue
-
-            # Extract package name and version requirement
-            version_match = re.match(r'([A-Za-z0-9.]+)\s*(\([^)]+\))?', dep)
-
-            if version_match:
-                dep_name = version_match.group(1).strip()
-                dep_version = version_match.group(2)
-
-                dep_info = {'name': dep_name}
-
-                if dep_version:
-                    # Clean up the version string removing parentheses
-                    dep_version = dep_version.strip('()')
-                    dep_info['version'] = dep_version
-
-                result.append(dep_info)
+        start = time.time()
+        packages_url = url + 'src/contrib/PACKAGES'
+        response = http_get(packages_url)
+        if response.status_code < 200 or response.status_code > 299:
+            logging.error('get URL error: %s %s', response.status_code, url)
+            sys.exit(1)
+        view_packages = dcf.parse_packages(io.StringIO(response.text))
+        for package_info in view_packages.values():
+            package_info['View'] = view
+            package_info['Status'] = 'package'
+        return view_packages, packages_url, response.headers.get('Last-Modified'), time.time() - start
 
-        return result
+    def parse_dependency_list(self, dependency_string):
+        """ see dcf.parse_dependency_list() """
+        return dcf.parse_dependency_list(dependency_string)
 
     def add_JSON_package(self, pkg):
         """ Add JSON package to the Bioconductor dictionary
@@ -210,33 +209,67 @@ class Bioconductor_packages:
         """ Check if the package is in the Bioconductor archive
         """
         #  print(f'Checking archive for package: {pkg}')
-        bioc_archive = f'https://bioconductor.org/packages/release/bioc/html/{pkg["Package"]}.html'
-        response = requests.get(bioc_archive, timeout=10)
+        bioc_archive = f'{BIOCONDUCTOR_URL}/packages/release/bioc/html/{pkg["Package"]}.html'
+        response = http_get(bioc_archive)
         if response.status_code < 200 or response.status_code >= 300:
             pkg['Status'] = 'archived'
             logging.info('%s while checking archive for: %s from view: %s', response.status_code, pkg['Package'], view)
         elif 'This package has been removed from Bioconductor.' in response.text:
             pkg['Status'] = 'deprecated'
 
+    def check_archives(self, view, packages):
+        """ run check_archive for a list of packages with a thread pool.
+        Verdicts are saved for each biocver, packages checked by an earlier run
+        are not checked again.
+        """
+        if not self.archive_status:
+            self.archive_status = self.snapshot.load_archive()
+        unchecked = []
+        for pkg in packages:
+            if pkg['Package'] in self.archive_status and not self.snapshot.refresh:
+                if self.archive_status[pkg['Package']] != 'package':
+                    pkg['Status'] = self.archive_status[pkg['Package']]
+            else:
+                unchecked.append(pkg)
+        if not unchecked:
+            return
+        with ThreadPoolExecutor(max_workers=ARCHIVE_JOBS) as pool:
+            list(pool.map(lambda pkg: self.check_archive(view, pkg), unchecked))
+        for pkg in unchecked:
+            self.archive_status[pkg['Package']] = pkg.get('Status', 'package')
+        self.snapshot.save_archive(self.archive_status)
+
     def read_bioconductor_json(self, view, url):
         """ Download the Bioconductor JSON data
         The JSON can be out of date, so we use the PACKAGES file for the most current 'Version'
         The JSON data has Title and Description
         'Title' is used by easy_annotate to display the package description
         """
+        json_data, bioc_url, last_modified, _ = self.download_bioconductor_json(url)
+        self.validators[bioc_url] = last_modified
+        self.merge_bioconductor_json(view, bioc_url, json_data)
+
+    def download_bioconductor_json(self, url):
+        """ returns (packages.json data, packages.json url, Last-Modified, seconds) """
+        start = time.time()
         json_data = {}
         #  packages: https://bioconductor.org/packages/{biocver}/bioc/PACKAGES',
         #  json      https://bioconductor.org/packages/json/{biocver} + '/bioc/packages.json'
-        bioc_url = url.replace('packages', 'packages/json') + 'packages.json'
-        response = requests.get(bioc_url, timeout=10)
+        bioc_url = url.replace('/packages/', '/packages/json/', 1) + 'packages.json'
+        response = http_get(bioc_url)
         if response.status_code < 200 or response.status_code >= 300:
             logging.error('%s while downloading: %s', response.status_code, bioc_url)
             sys.exit(1)
         json_data.update(response.json())
+        return json_data, bioc_url, response.headers.get('Last-Modified'), time.time() - start
+
+    def merge_bioconductor_json(self, view, bioc_url, json_data):
+        """ add Title and Description from packages.json to bioc_data """
         pkgcount = len(json_data.keys())
         mesg_index = bioc_url.find(self.biocver) + len(self.biocver) + 1
         if self.verbose:
             print(f' == downloading Bioconductor {bioc_url[mesg_index:]} - Package Count: {pkgcount}')
+        missing = []
         for pkg_name, pkg_dict in json_data.items():
             if pkg_name in self.bioc_data:
                 if 'Title' in json_data[pkg_name]:
@@ -244,7 +277,9 @@ class Bioconductor_packages:
                 if 'Description' in json_data[pkg_name]:
                     self.bioc_data[pkg_name]['Description'] = json_data[pkg_name]['Description']
             else:
-                self.check_archive(view, json_data[pkg_name])
+                missing.append(json_data[pkg_name])
+        if self.archive_checks:
+            self.check_archives(view, missing)
 
     def write_bioc_json(self, filename):
         """ Write the Bioconductor data to a JSON file
@@ -254,6 +289,32 @@ class Bioconductor_packages:
             json.dump(self.bioc_data, f, indent=4)
         f.close()
 
+    def read_bioc_json(self, filename):
+        """ Read Bioconductor data written by write_bioc_json
+        """
+        with open(filename, 'r') as f:
+            self.bioc_data = json.load(f)
+
+
+_instances = {}
+
+
+def get_bioconductor(biocver, verbose, archive_checks=True):
+    """ process wide Bioconductor_packages for biocver. A long running process
+    loads the data again once it is older than the metadata cache TTL
+    """
+    key = (biocver, archive_checks)
+    if key in _instances and time.time() - _instances[key][0] < metadata_cache.get_cache().ttl:
+        return _instances[key][1]
+    with phase('bioconductor'):
+        bioc = Bioconductor_packages(biocver, verbose, archive_checks)
+    _instances[key] = (time.time(), bioc)
+    return bioc
+
+
+def clear_instances():
+    _instances.clear()
+
 
 if __name__ == "__main__":
     logging.basicConfig(format='%(levelname)s [%(filename)s:%(lineno)-4d] %(message)s',
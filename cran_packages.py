@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import sys
+import gzip
+import time
+import logging
+import metadata_cache
+from metadata_cache import http_get
+from profiler import phase
+import dcf
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+CRAN_PACKAGES_URL = os.environ.get('EASY_UPDATE_CRAN_INDEX_URL',
+                                   'https://cloud.r-project.org/src/contrib/PACKAGES.gz')
+
+
+class CRAN_packages:
+    """
+    Load the CRAN repository index (src/contrib/PACKAGES) once and answer package
+    lookups from memory instead of querying crandb for every package.
+
+    Args: source, URL or local path of a PACKAGES or PACKAGES.gz file, or the
+          top directory of a CRAN mirror.
+
+    get_cran_package(name) returns the package metadata in the same shape as
+    crandb.r-pkg.org: dependencies are a dictionary of package name -> version.
+    """
+    def __init__(self, source=CRAN_PACKAGES_URL, verbose=False):
+        self.verbose = verbose
+        self.source = source
+        content = self.read_index(source)
+        self.cran_data = dcf.parse_packages(io.StringIO(content))
+        if self.verbose:
+            print(f' == CRAN index {source} - Package Count: {len(self.cran_data)}')
+
+    def read_index(self, source):
+        """ return the text of the PACKAGES file from a URL, file or mirror directory """
+        if source.startswith('http://') or source.startswith('https://'):
+            response = http_get(source)
+            if response.status_code < 200 or response.status_code > 299:
+                logging.error('get URL error: %s %s', response.status_code, source)
+                sys.exit(1)
+            content = response.content
+        else:
+            path = os.path.expanduser(source)
+            if os.path.isdir(path):
+                for index in ['src/contrib/PACKAGES.gz', 'src/contrib/PACKAGES',
+                              'PACKAGES.gz', 'PACKAGES']:
+                    if os.path.isfile(os.path.join(path, index)):
+                        path = os.path.join(path, index)
+                        break
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+            except IOError as err:
+                logging.error('can not read CRAN index %s: %s', source, err)
+                sys.exit(1)
+        if content[:2] == b'\x1f\x8b':
+            content = gzip.decompress(content)
+        return content.decode('utf-8', errors='replace')
+
+    def get_cran_package(self, name):
+        """ crandb style metadata for package name, or 'not found' """
+        if name not in self.cran_data or 'Version' not in self.cran_data[name]:
+            return 'not found'
+        package_info = self.cran_data[name]
+        cran_info = {}
+        for key, value in package_info.items():
+            if key in ['Depends', 'Imports', 'LinkingTo']:
+                cran_info[key] = {dep['name']: dep.get('version', '*') for dep in value}
+            else:
+                cran_info[key] = value
+        return cran_info
+
+
+_instances = {}
+
+
+def get_cran_index(source=CRAN_PACKAGES_URL, verbose=False):
+    """ process wide CRAN_packages for source. A long running process
+    reads the index again once it is older than the metadata cache TTL
+    """
+    if source in _instances and time.time() - _instances[source][0] < metadata_cache.get_cache().ttl:
+        return _instances[source][1]
+    with phase('cran_index'):
+        cran = CRAN_packages(source, verbose)
+    _instances[source] = (time.time(), cran)
+    return cran
+
+
+def clear_instances():
+    _instances.clear()
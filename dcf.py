@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+    dcf.py parses Debian Control File (DCF) data, the format of the CRAN and
+    Bioconductor PACKAGES files. Input is read one line at a time from any
+    iterable of lines (an open file, io.StringIO, a response line iterator)
+    and each dependency field is split in a single pass.
+"""
+
+import re
+import logging
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+DEPENDENCY_FIELDS = ('Imports', 'Depends', 'LinkingTo')
+# package name and optional version requirement: 'gdsfmt (>= 1.36.0)'
+match_dependency = re.compile(r'([A-Za-z0-9.]+)\s*(\([^)]+\))?').match
+
+
+def iter_stanzas(lines):
+    """ yield one dictionary per stanza. Continuation lines start with a space and
+    are joined to the previous field. 'Imports', 'Depends' and 'LinkingTo' are
+    parsed with parse_dependency_list.
+    Output matches the regular expression parser it replaced (benchmarks/bench_dcf.py),
+    including skipping the last field of each stanza (MD5sum or NeedsCompilation in
+    CRAN and Bioconductor files)
+    """
+    package_info = {}
+    current_key = None
+    current_value = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line:
+            if package_info:
+                yield finish_stanza(package_info)
+            package_info = {}
+            current_key = None
+            current_value = []
+            continue
+        if line[0] == ' ':
+            if current_key:
+                current_value.append(line.strip())
+            continue
+        key, colon, value = line.partition(':')
+        if not colon or not key.isalnum() or not key.isascii():
+            continue
+        value = value.lstrip()
+        if key == 'Package' or key == 'Version':
+            package_info[key] = value
+            continue
+        if current_key:
+            package_info[current_key] = ' '.join(current_value).strip()
+        current_key = key
+        current_value = [value]
+    if package_info:
+        yield finish_stanza(package_info)
+
+
+def finish_stanza(package_info):
+    for key in DEPENDENCY_FIELDS:
+        if key in package_info:
+            package_info[key] = parse_dependency_list(package_info[key])
+    return package_info
+
+
+def parse_packages(lines):
+    """ return {package name: fields} for PACKAGES data read from lines """
+    packages_data = {}
+    for package_info in iter_stanzas(lines):
+        if 'Package' in package_info:
+            packages_data[package_info['Package']] = package_info
+        else:
+            logging.debug('PACKAGES stanza without Package field: %s', package_info)
+    return packages_data
+
+
+def parse_dependency_list(dependency_string):
+    """
+    Parse a dependency string into a list of dictionaries with package names and versions.
+
+    Args:
+        dependency_string: A string like "R (>= 3.5.0), gdsfmt (>= 1.36.0), methods"
+
+    Returns:
+       List of dictionaries with keys 'name' and 'version' (if specified)
+    """
+    if not dependency_string:
+        return []
+    result = []
+    for dep in dependency_string.split(','):
+        match = match_dependency(dep.strip())
+        if match:
+            dep_name, dep_version = match.groups()
+            if dep_version:
+                result.append({'name': dep_name, 'version': dep_version.strip('()')})
+            else:
+                result.append({'name': dep_name})
+    return result
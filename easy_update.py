@@ -8,12 +8,16 @@
     current version for each package.
 """
 
+import os
 import sys
 import argparse
 import logging
-from framework import FrameWork
-from updateR import UpdateR
-from updatePython import UpdatePython
+import metadata_cache
+import network
+import pypi_mirror
+import marker
+import pypi_simple
+from cran_packages import CRAN_PACKAGES_URL
 
 __version__ = '2.3.2'
 __date__ = 'April 2, 2025'
@@ -29,11 +33,73 @@ def setup_parser():
                         help='Verbose; print lots of extra stuff')
     parser.add_argument('--debug', required=False, action='store_true',
                         help='set log level to debug, (default: false)')
+    parser.add_argument('-j', '--jobs', dest='jobs', required=False, type=int, default=1,
+                        help='number of concurrent metadata requests while resolving dependencies '
+                             '(default: 1)')
+    parser.add_argument('--cran-index', dest='cran_index', required=False, default=CRAN_PACKAGES_URL,
+                        help='URL or local mirror path of the CRAN PACKAGES index used by --exts-update '
+                             f'(default: {CRAN_PACKAGES_URL})')
+    parser.add_argument('--no-cran-index', dest='cran_index', required=False, action='store_const',
+                        const=None, help='query crandb.r-pkg.org for each R package instead of the CRAN index')
+    parser.add_argument('-p', '--processes', dest='processes', required=False, type=int, default=None,
+                        help='number of easyconfigs updated at the same time by --exts-update-batch '
+                             '(default: number of CPUs)')
+    parser.add_argument('--cache-dir', dest='cache_dir', required=False, default=None,
+                        help='directory for cached PyPI/CRAN/Bioconductor metadata '
+                             '(default: ~/.cache/easy_update)')
+    parser.add_argument('--no-cache', dest='no_cache', required=False, action='store_true',
+                        help='do not read or write the metadata cache')
+    parser.add_argument('--refresh', required=False, action='store_true',
+                        help='revalidate every cached metadata entry with upstream')
+    parser.add_argument('--timeout', dest='timeout', required=False, type=float, default=network.DEFAULT_TIMEOUT,
+                        metavar='seconds', help='timeout of each PyPI/CRAN/Bioconductor request '
+                                                f'(default: {network.DEFAULT_TIMEOUT})')
+    parser.add_argument('--retries', dest='retries', required=False, type=int, default=network.DEFAULT_RETRIES,
+                        help='retries of a request after a connection error, timeout or 5xx response '
+                             f'(default: {network.DEFAULT_RETRIES})')
+    parser.add_argument('--deadline', dest='deadline', required=False, type=float, default=None,
+                        metavar='seconds', help='stop when the requests of the run take longer than seconds')
+    parser.add_argument('--pypi-api', dest='pypi_api', required=False, choices=pypi_simple.APIS, default='simple',
+                        help="'simple': read the latest release and its .metadata file from the PyPI Simple API, "
+                             "'json': read every release from the PyPI JSON API (default: simple)")
+    parser.add_argument('--pypi-mirror', dest='pypi_mirror', required=False,
+                        default=os.environ.get('EASY_UPDATE_PYPI_MIRROR'), metavar='directory',
+                        help='read Python packages from a local mirror: a bandersnatch directory or a simple '
+                             'index directory or file:// URL (default: $EASY_UPDATE_PYPI_MIRROR)')
+    parser.add_argument('--python-versions', dest='python_versions', required=False, default=None,
+                        metavar='3.9,3.12', help='also evaluate the requires_dist markers of Python packages '
+                                                 'for these Python versions, one metadata request answers all')
+    parser.add_argument('--record', dest='record', required=False, default=None, metavar='directory',
+                        help='save every PyPI/CRAN/Bioconductor response to directory for --replay')
+    parser.add_argument('--replay', dest='replay', required=False, default=None, metavar='directory',
+                        help='answer every request from responses saved by --record, without network access')
+    parser.add_argument('--replay-latency', dest='replay_latency', required=False, default='0',
+                        metavar='ms', help="delay added to each replayed response in ms, or 'recorded' "
+                                           'to repeat the recorded response times (default: 0)')
+    parser.add_argument('--profile', required=False, action='store_true',
+                        help='print time per phase, requests per host and the slowest packages at the end')
+    parser.add_argument('--profile-json', dest='profile_json', required=False, default=None, metavar='file',
+                        help='write the --profile report to a JSON file')
+    parser.add_argument('--profile-top', dest='profile_top', required=False, type=int, default=10,
+                        metavar='N', help='number of slowest packages in the --profile report (default: 10)')
+    parser.add_argument('--server', dest='server', required=False, default=None, metavar='socket',
+                        help='run the operation in the easy_update server listening on socket '
+                             '(default: $EASY_UPDATE_SOCKET, or <cache-dir>/server.sock if it exists)')
+    parser.add_argument('--no-server', dest='no_server', required=False, action='store_true',
+                        help='always run the operation in this process')
+    parser.add_argument('--server-memory', dest='server_memory', required=False, type=int, default=2048,
+                        metavar='MB', help='--serve restarts above this resident size (default: 2048)')
+    parser.add_argument('--server-idle', dest='server_idle', required=False, type=int, default=30,
+                        metavar='minutes', help='--serve drops cached data after minutes without requests '
+                                                '(default: 30)')
     # Create parent mutually exclusive group
     group = parser.add_mutually_exclusive_group(required=True)
 
     group.add_argument('--exts-update', dest='operation', action='store_const', const=(True, 'update'),
                        metavar='easyconfig', help='update version info for exts_list in EasyConfig')
+    group.add_argument('--exts-update-batch', dest='operation', action='store_const',
+                       const=(False, 'update_batch'), metavar='path',
+                       help='update many easyconfigs: a directory, a glob pattern or a file with a list of easyconfigs')
     group.add_argument('--exts-annotate', dest='operation', action='store_const', const=(True, 'annotate'),
                        metavar='easyconfig', help='Annotate all extensions from EasyConfig and dependencies')
     group.add_argument('--exts-dep-graph',  dest='operation', action='store_const', const=(True, 'dep_graph'),
@@ -44,6 +110,9 @@ def setup_parser():
                        metavar='Library', help='output libray metadata from CRAN/BioConductor')
     group.add_argument('--exts-search-pypi', dest='operation', action='store_const', const=(False, 'search_pypi'),
                        metavar='Library', help='output library metadata from PyPi')
+    group.add_argument('--serve', dest='operation', action='store_const', const=(False, 'serve'),
+                       metavar='socket', help='keep metadata in memory and run operations sent by '
+                                              'easy_update.py over a UNIX socket')
     parser.add_argument('value', nargs='?', help='Value for the selected operation')
 
     return parser
@@ -63,36 +132,111 @@ def process_arguments(args):
         logger.setLevel(logging.DEBUG)
     elif args.verbose:
         logger.setLevel(logging.INFO)
-    if not args.operation or not args.value:
+    if not args.operation or (not args.value and args.operation[1] != 'serve'):
         parser.error("A value must be provided for the selected operation")
         sys.exit(1)
+    metadata_cache.configure(cache_dir=args.cache_dir, enabled=not args.no_cache,
+                             refresh=args.refresh)
+    network.configure(timeout=args.timeout, retries=args.retries, deadline=args.deadline)
+    pypi_simple.configure(args.pypi_api)
+    pypi_mirror.configure(args.pypi_mirror)
+    if args.python_versions:
+        try:
+            args.python_versions = marker.parse_python_versions(args.python_versions)
+        except ValueError as err:
+            logging.error('--python-versions must be major.minor versions separated by commas: %s', err)
+            sys.exit(1)
+    marker.configure(args.python_versions)
+    if args.profile or args.profile_json:
+        import profiler
+        profiler.enable()
+    if args.record or args.replay:
+        if args.record and args.replay:
+            logging.error('--record and --replay can not be used together')
+            sys.exit(1)
+        from fixtures import FixtureStore, parse_latency
+        try:
+            latency = parse_latency(args.replay_latency)
+        except ValueError:
+            logging.error("--replay-latency must be a number of ms or 'recorded': %s", args.replay_latency)
+            sys.exit(1)
+        if args.record:
+            metadata_cache.set_fixtures(FixtureStore(args.record, 'record'))
+        elif not os.path.isdir(args.replay):
+            logging.error('no recorded responses in %s', args.replay)
+            sys.exit(1)
+        else:
+            metadata_cache.set_fixtures(FixtureStore(args.replay, 'replay', latency))
 
     is_file, operation = args.operation
     argument = args.value
     verbose = args.verbose
-    return (is_file, operation, verbose, argument)
+    return (is_file, operation, verbose, argument, args.jobs, args.cran_index, args.processes)
 
 
-def main():
-    """ main """
-    parser = setup_parser()
-    args = parser.parse_args()
-    return process_arguments(args)
+def run_operation(is_file, operation, verbose, argument, jobs=1, cran_index=None, processes=None):
+    """ run one operation, return the exit status. Used by main and by the server """
+    # each operation imports only the modules it uses, searches start quickly
+    if operation == 'search_pypi':
+        from updatePython import UpdatePython
+        UpdatePython(argument, operation, verbose, None)
+        return 0
+    if operation == 'search_cran':
+        from updateR import UpdateR
+        UpdateR(argument, operation, verbose, None)
+        return 0
 
-
-if __name__ == '__main__':
-    (is_file, operation, verbose, argument) = main()
+    if operation == 'update_batch':
+        from batch import run_batch
+        failed = run_batch(argument, verbose, jobs, cran_index, processes)
+        return 1 if failed else 0
 
     if is_file:
+        from framework import FrameWork
+        from updateR import UpdateR
+        from updatePython import UpdatePython
         no_dependencies = False
         if operation in ['dep_graph', 'description']:
             no_dependencies = True
         eb = FrameWork(argument, verbose, no_dependencies)
         if operation in ['update', 'annotate', 'description']:
             if eb.language == 'R':
-                UpdateR(argument, operation, verbose, eb)
+                UpdateR(argument, operation, verbose, eb, jobs, cran_index)
             elif eb.language == 'Python':
-                UpdatePython(argument, operation, verbose, eb)
+                UpdatePython(argument, operation, verbose, eb, jobs)
         elif operation == 'dep_graph':
             if eb.language == 'Python':
-                UpdatePython(arg, operation, verbose, eb)
+                UpdatePython(argument, operation, verbose, eb)
+        if eb.out:
+            eb.out.close()
+    return 0
+
+
+def main():
+    """ main """
+    parser = setup_parser()
+    args = parser.parse_args()
+    (is_file, operation, verbose, argument, jobs, cran_index, processes) = process_arguments(args)
+    import server
+    if operation == 'serve':
+        return server.serve(argument or server.default_socket_path(args.cache_dir), args)
+    socket_path = server.find_server(args)
+    if socket_path:
+        status = server.run_remote(socket_path, args)
+        if status is not None:
+            return status
+    status = run_operation(is_file, operation, verbose, argument, jobs, cran_index, processes)
+    fixtures = metadata_cache.get_fixtures()
+    if fixtures:
+        print(fixtures.summary())
+    if args.profile or args.profile_json:
+        import profiler
+        if args.profile:
+            profiler.get_profiler().print_report(args.profile_top)
+        if args.profile_json:
+            profiler.get_profiler().write_json(args.profile_json, args.profile_top)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
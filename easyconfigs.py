@@ -5,21 +5,24 @@
     Use the environment variable EBROOTEASYBUIILD to find the easyconfigs directory.
 
     Usage:
-        easyconfigs.py [--toolchain=<toolchain>] [--easyconfig-path=<easyconfig_path>]
+        easyconfigs.py [--toolchain=<toolchain>] [--robot=<easyconfig_path>] [--processes=<N>]
         easyconfigs.py (-h | --help)
 
     Options:
         -h --help                   Show this help message.
         --toolchain=<toolchain>     Toolchain to filter by. toolchain is mandatory.
         --robot=<path>    Path to the easyconfig directory.
+        --processes=<N>   Number of easyconfigs read at the same time (default: number of CPUs)
 """
 import os
 import sys
 import argparse
 import logging
 import json
+from concurrent.futures import ProcessPoolExecutor
 from toolchains import Toolchain
-from framework import FrameWork
+from framework import FrameWork, easyconfig_search_paths
+from ec_index import get_index
 
 py_modules = {}
 ec_modules = {}
@@ -33,6 +36,8 @@ def parse_args():
     parser.add_argument('--verbose', action='store_true', help='Enable verbose output.')
     parser.add_argument('--toolchain', type=str, required=True, help='Toolchain to filter by. toolchain is mandatory.')
     parser.add_argument('--robot', type=str, help='Path to the easyconfigs directory.')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of easyconfigs read at the same time (default: number of CPUs).')
     return parser.parse_args()
 
 
@@ -89,19 +94,66 @@ def collect_python_modules(eb, eb_module_name):
     collect_python_modules_from_exts(eb_module_name, exts, primary_module)
 
 
-def find_python_modules(easyconfig_path):
+def find_python_modules(easyconfig_path, base_paths=None):
     """ read the easyconfig file and find the python modules used in the easyconfig file.
     Args:
         easyconfig_path (str): Path to the easyconfig file.
+        base_paths (list): easyconfig search paths, found from easyconfig_path if None
     Returns:
         list: List of python modules used in the easyconfig file.
     """
-    eb = FrameWork(easyconfig_path, verbose=False, no_dependencies=True)
+    eb = FrameWork(easyconfig_path, verbose=False, no_dependencies=True, base_paths=base_paths)
     if eb.language == 'Python':
         eb_module_name = os.path.basename(easyconfig_path)[:-3]
         collect_python_modules(eb, eb_module_name)
 
 
+worker_base_paths = None
+
+
+def init_worker(easyconfig_path):
+    """ the search paths are the same for every easyconfig, find them once per worker """
+    global worker_base_paths
+    worker_base_paths = easyconfig_search_paths(easyconfig_path)
+
+
+def scan_easyconfig(easyconfig):
+    """ worker: collect the python modules of one easyconfig.
+    Returns (easyconfig, py_modules, ec_modules, error) for this easyconfig only.
+    """
+    py_modules.clear()
+    ec_modules.clear()
+    error = None
+    try:
+        find_python_modules(easyconfig, worker_base_paths)
+    except SystemExit as err:
+        error = f'exit {err.code}'
+    except Exception as err:
+        error = f'{type(err).__name__}: {err}'
+    return easyconfig, dict(py_modules), dict(ec_modules), error
+
+
+def scan_easyconfigs(easyconfigs, easyconfig_path, processes=None):
+    """ read easyconfigs with a process pool. Results are merged into py_modules
+    and ec_modules in the order of easyconfigs, the same as reading them one at a time.
+    """
+    total = len(easyconfigs)
+    failed = 0
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                             initargs=(easyconfig_path,)) as pool:
+        results = pool.map(scan_easyconfig, easyconfigs, chunksize=8)
+        for counter, (easyconfig, ec_py_modules, ec_ec_modules, error) in enumerate(results, 1):
+            if error:
+                failed += 1
+                logging.warning('%s: %s', easyconfig, error)
+            for module_name, entries in ec_py_modules.items():
+                py_modules.setdefault(module_name, []).extend(entries)
+            ec_modules.update(ec_ec_modules)
+            if counter % 50 == 0 or counter == total:
+                print(f"\r{counter}/{total} easyconfigs", end='', flush=True)
+    print(f"\nRead {total} easyconfigs, {len(ec_modules)} Python modules, {failed} errors")
+
+
 def find_easyconfigs(toolchains, easyconfig_path):
     """ Walk the EasyBuild easyconfigs directory and generate a list of
     easyconfig files that match a given toolchain. Toolchains is a list
@@ -115,18 +167,15 @@ def find_easyconfigs(toolchains, easyconfig_path):
     fcounter = 0
     ecounter = 0
     easyconfigs = []
-    for root, dirs, files in os.walk(easyconfig_path):
-        for file in files:
-            if file.endswith('.eb'):
-                for tc in toolchains:
-                    if tc in file:
-                        easyconfigs.append(os.path.join(root, file))
-                        ecounter += 1
-                        break
-            fcounter += 1
-            if fcounter % 500 == 0:
-                print(".", end='', flush=True)
-    print(f"\nFound {ecounter} Python easyconfig files in {fcounter} files for Toolchain {toolchains}")
+    for path in get_index(easyconfig_path).easyconfigs():
+        file = os.path.basename(path)
+        for tc in toolchains:
+            if tc in file:
+                easyconfigs.append(path)
+                ecounter += 1
+                break
+        fcounter += 1
+    print(f"Found {ecounter} Python easyconfig files in {fcounter} easyconfigs for Toolchain {toolchains}")
     return easyconfigs
 
 
@@ -142,8 +191,8 @@ def get_easyconfig_path_from_env():
 
 def main():
     args = parse_args()
-    if args.easyconfig_path:
-        easyconfig_path = args.easyconfig_path
+    if args.robot:
+        easyconfig_path = args.robot
     else:
         easyconfig_path = get_easyconfig_path_from_env()
     if args.verbose:
@@ -158,8 +207,7 @@ def main():
     logging.info("Easyconfig path: %s", easyconfig_path)
 
     easyconfigs = find_easyconfigs(tc.toolchains, easyconfig_path)
-    for easyconfig in easyconfigs:
-        find_python_modules(easyconfig)
+    scan_easyconfigs(easyconfigs, easyconfig_path, args.processes)
     for mod in py_modules.keys():
         print(f"{mod}")
         for ext in py_modules[mod]:
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+    ec_cache.py saves the fields easy_update reads from an easyconfig so an
+    unchanged file does not have to be interpreted with exec again.
+    Entries are keyed by the path of the easyconfig and checked against a
+    hash of its content and of the EasyBuild constants (templates.py,
+    constants.py) it was interpreted with, those are expanded in the
+    saved values.
+"""
+
+import os
+import pickle
+import hashlib
+import logging
+import metadata_cache
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+CACHE_FORMAT = 1
+
+# easyconfig parameters used by FrameWork, easyconfigs.py and add_to_python_dep_exts
+EASYCONFIG_FIELDS = (
+    'name', 'version', 'versionsuffix', 'toolchain', 'easyblock', 'default_easyblock',
+    'exts_defaultclass', 'exts_default_options', 'exts_list', 'dependencies', 'options',
+    'local_biocver', 'local_pyshortver',
+)
+
+
+class ParsedEasyconfigCache:
+    """ one pickle file per easyconfig in <cache_dir>/easyconfigs/
+    containing (format, content hash, {field: value}). eb_globals are the
+    constants the easyconfigs are interpreted with
+    """
+    def __init__(self, cache_dir=None, eb_globals=None):
+        cache = metadata_cache.get_cache()
+        self.globals_digest = self.globals_hash(eb_globals or {})
+        self.enabled = cache.enabled
+        self.cache_dir = os.path.join(cache_dir or cache.cache_dir, 'easyconfigs')
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, file_name):
+        key = hashlib.sha256(os.path.abspath(file_name).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + '.pickle')
+
+    @staticmethod
+    def globals_hash(eb_globals):
+        return hashlib.sha256(repr(sorted(eb_globals.items())).encode('utf-8')).hexdigest()
+
+    def content_hash(self, code):
+        return hashlib.sha256((self.globals_digest + code).encode('utf-8')).hexdigest()
+
+    def get(self, file_name, code):
+        """ return the saved fields for file_name if code has not changed, else None """
+        if not self.enabled:
+            return None
+        try:
+            with open(self.path(file_name), 'rb') as f:
+                cache_format, digest, fields = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            self.misses += 1
+            return None
+        if cache_format != CACHE_FORMAT or digest != self.content_hash(code):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return fields
+
+    def put(self, file_name, code, eb_dict):
+        """ save EASYCONFIG_FIELDS from the namespace of an interpreted easyconfig """
+        if not self.enabled:
+            return
+        fields = {field: eb_dict[field] for field in EASYCONFIG_FIELDS if field in eb_dict}
+        path = self.path(file_name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            data = pickle.dumps((CACHE_FORMAT, self.content_hash(code), fields),
+                                protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as err:
+            logging.debug('can not cache %s: %s', file_name, err)
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as err:
+            logging.warning('can not write easyconfig cache %s: %s', path, err)
+
+
+_cache = None
+
+
+def get_ec_cache(eb_globals=None):
+    """ process wide ParsedEasyconfigCache, uses the metadata cache directory """
+    global _cache
+    if _cache is None:
+        _cache = ParsedEasyconfigCache(eb_globals=eb_globals)
+    return _cache
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+"""
+    ec_index.py keeps an index of the .eb files below an easyconfigs directory.
+    The index is built with os.scandir, saved in the cache directory and
+    refreshed one directory at a time: a directory is only listed again
+    when its mtime has changed.
+"""
+
+import os
+import atexit
+import pickle
+import hashlib
+import logging
+import metadata_cache
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+INDEX_FORMAT = 2
+
+
+class EasyconfigIndex:
+    """ index of easyconfig files for one base path (.../easybuild/easyconfigs)
+    dirs: {relative dir: (mtime_ns, [.eb filenames], [sub directories])}
+    files: {filename: set(relative dirs)}
+    Directories are checked against the file system at most once per process.
+    """
+    def __init__(self, base_path):
+        self.base_path = base_path
+        cache = metadata_cache.get_cache()
+        self.persist = cache.enabled
+        key = hashlib.sha256(os.path.abspath(base_path).encode('utf-8')).hexdigest()[:16]
+        self.index_file = os.path.join(cache.cache_dir, 'ec_index', key + '.pickle')
+        self.dirs = {}
+        self.files = {}
+        self.checked = set()
+        self.dirty = False
+        if self.persist:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.index_file, 'rb') as f:
+                index = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        if index.get('format') != INDEX_FORMAT or index.get('base_path') != self.base_path:
+            return
+        self.dirs = index['dirs']
+        for rel, (mtime, filenames, subdirs) in self.dirs.items():
+            for filename in filenames:
+                self.files.setdefault(filename, set()).add(rel)
+
+    def save(self):
+        if not self.persist or not self.dirty:
+            return
+        tmp = f"{self.index_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                pickle.dump({'format': INDEX_FORMAT, 'base_path': self.base_path, 'dirs': self.dirs},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.index_file)
+            self.dirty = False
+        except OSError as err:
+            logging.warning('can not write easyconfig index %s: %s', self.index_file, err)
+
+    def refresh(self, top=''):
+        """ bring the index up to date for directory top and everything below it """
+        stack = [top]
+        while stack:
+            rel = stack.pop()
+            if rel not in self.checked:
+                self.checked.add(rel)
+                try:
+                    mtime = os.stat(os.path.join(self.base_path, rel)).st_mtime_ns
+                except OSError:
+                    self.drop(rel)
+                    continue
+                if rel not in self.dirs or self.dirs[rel][0] != mtime:
+                    self.scan(rel, mtime)
+            if rel in self.dirs:
+                stack.extend(self.dirs[rel][2])
+
+    def scan(self, rel, mtime):
+        """ list one directory and replace its entry in the index """
+        filenames = []
+        subdirs = []
+        try:
+            with os.scandir(os.path.join(self.base_path, rel)) as it:
+                for entry in it:
+                    # symlinked directories are not followed, as os.walk did; a link back up the tree would loop
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(os.path.join(rel, entry.name))
+                    elif entry.name.endswith('.eb'):
+                        filenames.append(entry.name)
+        except OSError as err:
+            # not readable or removed since stat, skipped as os.walk did
+            logging.debug('can not list %s: %s', os.path.join(self.base_path, rel), err)
+            self.drop(rel)
+            return
+        filenames.sort()
+        subdirs.sort()
+        if rel in self.dirs:
+            for filename in self.dirs[rel][1]:
+                self.files[filename].discard(rel)
+            for subdir in self.dirs[rel][2]:
+                if subdir not in subdirs:
+                    self.drop(subdir)
+        for filename in filenames:
+            self.files.setdefault(filename, set()).add(rel)
+        self.dirs[rel] = (mtime, filenames, subdirs)
+        self.dirty = True
+
+    def drop(self, rel):
+        """ remove a directory that no longer exists, and everything below it """
+        if rel not in self.dirs:
+            return
+        mtime, filenames, subdirs = self.dirs.pop(rel)
+        for filename in filenames:
+            self.files[filename].discard(rel)
+        for subdir in subdirs:
+            self.drop(subdir)
+        self.dirty = True
+
+    def find(self, filename, top=''):
+        """ full path of filename below directory top, or None """
+        self.refresh(top)
+        prefix = top + os.sep if top else ''
+        for rel in sorted(self.files.get(filename, ())):
+            if rel == top or rel.startswith(prefix):
+                return os.path.join(self.base_path, rel, filename)
+        return None
+
+    def easyconfigs(self):
+        """ full path of every easyconfig in the index """
+        self.refresh()
+        for rel in sorted(self.dirs):
+            for filename in self.dirs[rel][1]:
+                yield os.path.join(self.base_path, rel, filename)
+
+
+_indexes = {}
+
+
+def get_index(base_path):
+    """ return the process wide index for base_path, saved when the process exits """
+    if base_path not in _indexes:
+        index = EasyconfigIndex(base_path)
+        _indexes[base_path] = index
+        atexit.register(index.save)
+    return _indexes[base_path]
+
+
+def reset_checks():
+    """ save the indexes and look at the file system again on the next lookup.
+    Used by long running processes between requests
+    """
+    for index in _indexes.values():
+        index.save()
+        index.checked.clear()
+
+
+def clear_indexes():
+    """ save and forget every index """
+    for index in _indexes.values():
+        index.save()
+    _indexes.clear()
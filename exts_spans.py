@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+    exts_spans.py locates each entry of exts_list in the text of an easyconfig.
+    The file is parsed once with ast; every entry gets the spans of its name,
+    version, options dict and checksums. ExtsListWriter produces the updated
+    file by splicing those spans, unchanged text is written through as is.
+
+    Spans are offsets into the str of the easyconfig. ast reports columns in
+    UTF-8 bytes, they are converted to characters.
+"""
+
+import ast
+import logging
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+
+class ExtEntry:
+    """ one element of exts_list.
+    start, end: the entry, a tuple '(...)' or a string
+    is_tuple: the entry is a tuple, strings are R base libraries
+    name, version, options, checksums: (start, end) or None
+    checksums covers the 'checksums' item of options with the white space before it and
+    the rest of its line, the text removed when the version changes
+    comma: the entry is followed by a comma
+    line_start: start of the line when the entry is the first thing on its line, else start
+    tail_end: after the comma and, when nothing else follows on the line, the end of line
+    """
+    __slots__ = ('start', 'end', 'is_tuple', 'name', 'version', 'options', 'checksums',
+                 'comma', 'line_start', 'tail_end')
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.is_tuple = False
+        self.name = None
+        self.version = None
+        self.options = None
+        self.checksums = None
+        self.comma = False
+        self.line_start = start
+        self.tail_end = end
+
+
+class SourceOffsets:
+    """ convert ast (lineno, col_offset) to offsets in code """
+    def __init__(self, code):
+        self.lines = code.splitlines(keepends=True)
+        self.line_start = [0]
+        for line in self.lines:
+            self.line_start.append(self.line_start[-1] + len(line))
+
+    def offset(self, lineno, col_offset):
+        line = self.lines[lineno - 1] if lineno <= len(self.lines) else ''
+        if not line.isascii():
+            col_offset = len(line.encode('utf-8')[:col_offset].decode('utf-8', errors='replace'))
+        return self.line_start[lineno - 1] + col_offset
+
+    def span(self, node):
+        return (self.offset(node.lineno, node.col_offset),
+                self.offset(node.end_lineno, node.end_col_offset))
+
+
+def find_exts_list(tree):
+    """ the ast.List assigned to exts_list at module level """
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.List):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id == 'exts_list':
+                    return node.value
+    return None
+
+
+def parse_exts_list(code):
+    """ return (body_start, [ExtEntry]) for the exts_list of code, or None.
+    body_start is the first line after 'exts_list = [' when the list continues on a new line
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as err:
+        logging.error('can not parse easyconfig: %s', err)
+        return None
+    node = find_exts_list(tree)
+    if node is None:
+        return None
+    offsets = SourceOffsets(code)
+    list_start, list_end = offsets.span(node)
+    body_start = skip_line_end(code, list_start + 1)
+    entries = []
+    for element in node.elts:
+        entry = ExtEntry(*offsets.span(element))
+        if isinstance(element, ast.Tuple):
+            entry.is_tuple = True
+            if len(element.elts) > 0:
+                entry.name = offsets.span(element.elts[0])
+            if len(element.elts) > 1:
+                entry.version = offsets.span(element.elts[1])
+            if len(element.elts) > 2 and isinstance(element.elts[2], ast.Dict):
+                entry.options = offsets.span(element.elts[2])
+                entry.checksums = checksums_span(code, offsets, element.elts[2])
+        else:
+            entry.name = (entry.start, entry.end)
+        pos = skip_blanks(code, entry.end)
+        if code.startswith(',', pos):
+            entry.comma = True
+            pos += 1
+        entry.tail_end = skip_line_end(code, pos)
+        line_start = code.rfind('\n', 0, entry.start) + 1
+        if not code[line_start:entry.start].strip():
+            entry.line_start = line_start
+        entries.append(entry)
+    return body_start, entries
+
+
+def checksums_span(code, offsets, options):
+    """ span of the 'checksums' item of an options dict, or None """
+    for key, value in zip(options.keys, options.values):
+        if isinstance(key, ast.Constant) and key.value == 'checksums':
+            start = offsets.offset(key.lineno, key.col_offset)
+            while start > 0 and code[start - 1].isspace():
+                start -= 1
+            end = skip_blanks(code, offsets.offset(value.end_lineno, value.end_col_offset))
+            if code.startswith(',', end):
+                end += 1
+            end = skip_blanks(code, end)
+            if code.startswith('#', end):
+                end = code.find('\n', end)
+                end = len(code) if end == -1 else end
+            return (start, end)
+    return None
+
+
+def skip_blanks(code, pos):
+    while pos < len(code) and code[pos] in ' \t':
+        pos += 1
+    return pos
+
+
+def skip_line_end(code, pos):
+    """ skip blanks and a comment to after the end of line, if nothing else is on the line """
+    end = skip_blanks(code, pos)
+    if code.startswith('#', end):
+        end = code.find('\n', end)
+        end = len(code) if end == -1 else end
+    if code.startswith('\n', end):
+        return end + 1
+    if end == len(code):
+        return end
+    return pos
+
+
+class ExtsListWriter:
+    """ write code to out, changing exts_list one entry at a time.
+    Entries are handled in file order; text that is not changed is written through.
+    """
+    def __init__(self, code, out, body_start):
+        self.code = code
+        self.out = out
+        self.pos = 0
+        self.pending = None     # entry written up to its end, comma and end of line not yet
+        self.write_through(body_start)
+
+    def write_through(self, end):
+        if end > self.pos:
+            self.out.write(self.code[self.pos:end])
+            self.pos = end
+
+    def flush(self, inserting=False):
+        """ finish the previous entry; a comma is added if an entry is inserted after it """
+        if self.pending:
+            self.write_through(self.pending.end)
+            if inserting and not self.pending.comma:
+                self.out.write(',')
+            self.write_through(self.pending.tail_end)
+            self.pending = None
+
+    def keep(self, entry):
+        self.flush()
+        self.write_through(entry.end)
+        self.pending = entry
+
+    def update(self, entry, version):
+        """ write entry with a new version, without checksums """
+        self.flush()
+        if entry.version is None:
+            self.keep(entry)
+            return
+        start, end = entry.version
+        quote = self.code[start] if self.code[start] in '\'"' else "'"
+        self.write_through(start)
+        self.out.write(f"{quote}{version}{quote}")
+        self.pos = end
+        if entry.checksums:
+            self.write_through(entry.checksums[0])
+            self.pos = entry.checksums[1]
+        self.write_through(entry.end)
+        self.pending = entry
+
+    def remove(self, entry):
+        """ drop entry, its line is dropped when it is alone on the line """
+        self.flush()
+        self.write_through(entry.line_start)
+        self.pos = entry.tail_end
+
+    def insert(self, text):
+        """ write text after the previous entry """
+        self.flush(inserting=True)
+        self.out.write(text)
+
+    def finish(self):
+        self.flush()
+        self.write_through(len(self.code))
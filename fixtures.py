@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""
+    fixtures.py records the HTTP responses of a run and replays them offline.
+    Every request made through metadata_cache.http_get/http_head (PyPI,
+    crandb, CRAN and Bioconductor) is saved as one gzip compressed JSON file
+    per request: <directory>/<sha256 of method and url>.json.gz
+
+    --record <directory>  save each response as it is returned to the caller
+    --replay <directory>  answer every request from the directory, nothing is
+                          sent to the network. --replay-latency adds a delay in
+                          ms per request, or 'recorded' to repeat the recorded times.
+"""
+
+import os
+import json
+import gzip
+import time
+import base64
+import hashlib
+import logging
+import threading
+from metadata_cache import CachedResponse
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+FIXTURE_FORMAT = 1
+KEEP_HEADERS = ('ETag', 'Last-Modified', 'Content-Type')
+
+
+class FixtureStore:
+    """ mode is 'record' or 'replay'. latency: seconds added to each replayed
+    request, or 'recorded' to sleep for the time the request took when recorded
+    """
+    def __init__(self, directory, mode, latency=0):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.mode = mode
+        self.latency = latency
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+        self.lock = threading.Lock()
+        if mode == 'record':
+            os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, method, url):
+        key = hashlib.sha256(f'{method} {url}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + '.json.gz')
+
+    def request(self, method, url, send):
+        """ return the response for method and url. send() makes the request
+        when recording
+        """
+        if self.mode == 'replay':
+            return self.replay(method, url)
+        start = time.time()
+        response = send()
+        self.record(method, url, response, time.time() - start)
+        return response
+
+    def record(self, method, url, response, elapsed):
+        fixture = {'format': FIXTURE_FORMAT, 'method': method, 'url': url,
+                   'status': response.status_code, 'elapsed': round(elapsed, 4),
+                   'headers': {h: response.headers[h] for h in KEEP_HEADERS if h in response.headers}}
+        try:
+            fixture['body'] = response.content.decode('utf-8')
+        except UnicodeDecodeError:
+            fixture['body_base64'] = base64.b64encode(response.content).decode('ascii')
+        path = self.path(method, url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                json.dump(fixture, f)
+            os.replace(tmp, path)
+        except OSError as err:
+            logging.warning('can not record %s: %s', url, err)
+            return
+        with self.lock:
+            self.recorded += 1
+
+    def replay(self, method, url):
+        try:
+            with gzip.open(self.path(method, url), 'rt', encoding='utf-8') as f:
+                fixture = json.load(f)
+        except (OSError, ValueError):
+            logging.error('no recorded response for %s %s', method, url)
+            with self.lock:
+                self.missing += 1
+            return CachedResponse(url, 404, b'', {}, from_cache=True)
+        if 'body_base64' in fixture:
+            content = base64.b64decode(fixture['body_base64'])
+        else:
+            content = fixture['body'].encode('utf-8')
+        delay = fixture['elapsed'] if self.latency == 'recorded' else self.latency
+        if delay:
+            time.sleep(delay)
+        with self.lock:
+            self.replayed += 1
+        return CachedResponse(url, fixture['status'], content, fixture['headers'], from_cache=True)
+
+    def settings(self):
+        """ arguments to create the same store in a worker process """
+        return (self.directory, self.mode, self.latency)
+
+    def summary(self):
+        """ batch workers replay and record in their own process: recordings are
+        counted in the directory, replays only when they were made in this process
+        """
+        if self.mode == 'record':
+            count = sum(1 for name in os.listdir(self.directory) if name.endswith('.json.gz'))
+            return f"== {count} responses recorded in {self.directory}"
+        if not self.replayed and not self.missing:
+            return f"== responses replayed from {self.directory}"
+        return f"== replayed {self.replayed} responses from {self.directory}, {self.missing} missing"
+
+
+def parse_latency(value):
+    """ --replay-latency: milliseconds or 'recorded' """
+    if value == 'recorded':
+        return value
+    return float(value) / 1000
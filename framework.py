@@ -3,11 +3,14 @@
 import os
 import sys
 import types
-import re
 import logging
 from templates import TEMPLATE_CONSTANTS
 from constants import EASYCONFIG_CONSTANTS
 from updatePython import add_to_python_dep_exts
+from ec_index import get_index
+from ec_cache import get_ec_cache
+from exts_spans import parse_exts_list, ExtsListWriter
+from profiler import phase
 
 """
     framework.py provides functionality to parse EasyConfig files.
@@ -19,11 +22,45 @@ __maintainer__ = 'John Dey jfdey@fredhutch.org'
 __date__ = 'Oct 10, 2024'
 
 
+def easyconfig_search_paths(filename):
+    """find the paths to EasyConfigs: the easyconfigs directory that filename is in,
+    and the easyconfigs from $EBROOTEASYBUILD
+    """
+    base_paths = []
+    userPath = os.path.expanduser(filename)
+    fullPath = os.path.abspath(userPath)
+    (head, tail) = os.path.split(fullPath)
+    local_path = None
+    while tail:
+        if 'easyconfigs' in tail:
+            local_path = os.path.join(head, tail)
+            base_paths.append(local_path)
+            logging.debug('local path to easyconfigs: {}'.format(local_path))
+            break
+        (head, tail) = os.path.split(head)
+    if local_path is None:
+        logging.error('You are not working in an EB repository, Quiting because I can not find dependancies.')
+        sys.exit(1)
+    eb_root = os.getenv('EBROOTEASYBUILD')
+    if eb_root is None:
+        logging.error('$EBROOTEASYBUILD environment variable must be defined.')
+        sys.exit(1)
+    else:
+        base_paths.append(os.path.join(eb_root, 'easybuild/easyconfigs'))
+    logging.debug("easyconfig search paths: %s", base_paths)
+    return base_paths
+
+
 class FrameWork:
     """provide access to EasyBuild Config file variables
     name, version, toolchain, eb.exts_list, dependencies, modulename, biocver,
     """
-    def __init__(self, easyconfig, verbose, no_dependencies):
+    eb_globals = None   # EasyBuild constants, built once per process
+
+    def __init__(self, easyconfig, verbose, no_dependencies, base_paths=None):
+        """ base_paths: easyconfig search paths, found from the easyconfig location
+        when not given. Callers creating many FrameWorks can pass them in.
+        """
         self.easyconfig = easyconfig
         self.verbose = verbose
         self.language = None
@@ -33,16 +70,20 @@ class FrameWork:
         self.search_pkg = None
         self.indent_n = 4
         self.indent = ' ' * self.indent_n
-        self.ptr_head = 0
         self.modulename = None
         self.dep_exts = []
         self.exts_list = []
         self.base_paths = []
-        self.find_easyconfig_paths(easyconfig)
+        self.out = None
+        if base_paths:
+            self.base_paths = list(base_paths)
+        else:
+            self.find_easyconfig_paths(easyconfig)
         logging.debug("EasyConfig search paths: {}".format(self.base_paths))
 
         # update EasyConfig exts_list
-        self.eb_header = self.build_eb_header_constant()
+        if FrameWork.eb_globals is None:
+            FrameWork.eb_globals = self.build_eb_globals()
 
         eb = self.parse_eb(easyconfig, primary=True)
         if 'exts_list' in eb.__dict__:
@@ -66,6 +107,10 @@ class FrameWork:
             self.versionsuffix = eb.versionsuffix % self.interpolate
         else:
             self.versionsuffix = None
+        try:
+            self.biocver = eb.local_biocver
+        except AttributeError:
+            self.biocver = None
         if self.language == 'R' and self.rver is None:
             print('== R EasyConfig without version')
         elif self.language == 'Python' and self.pyver is None:
@@ -84,18 +129,16 @@ class FrameWork:
         if self.versionsuffix:
             self.modulename += self.versionsuffix
         logging.debug('modulename: %s' % self.modulename)
-        
-        try:
-            self.biocver = eb.local_biocver
-        except AttributeError:
-            self.biocver = None
         self.check_eb_package_name(easyconfig)
         self.out = open(easyconfig[:-3] + ".update", 'w')
 
+    @phase('parse_eb')
     def parse_eb(self, file_name, primary):
         """ interpret EasyConfig file with 'exec'.  Interperting fails if
-        constants that are not defined within the EasyConfig file.  Add
-        undefined constants to <header>. Copy templates.py from EasyBuild
+        constants that are not defined within the EasyConfig file.  Undefined
+        constants are preset from eb_globals. Copy templates.py from EasyBuild
+        The fields used by easy_update are cached, an easyconfig that has not
+        changed since it was last interpreted is not run again.
         """
         eb = types.ModuleType("EasyConfig")
         try:
@@ -104,19 +147,26 @@ class FrameWork:
         except IOError as err:
             logging.debug("Error reading %s: %s" % (file_name, err))
             sys.exit(1)
+        if primary:     # save original text of source code
+            self.code = code
+        ec_cache = get_ec_cache(self.eb_globals)
+        fields = ec_cache.get(file_name, code)
+        if fields is not None:
+            eb.__dict__.update(fields)
+            return eb
 
         # Define a safe execution environment
         safe_locals = eb.__dict__
+        safe_locals.update(self.eb_globals)
         try:
-            exec(self.eb_header + code, safe_locals)
+            exec(code, safe_locals)
         except Exception as err:
             logging.error('interperting %s EasyConfig error: %s', file_name, err)
             fname = os.path.basename(file_name)[:-3]
             with open(fname + '.err', "w") as f:
-                code = f.write(self.eb_header + code)
+                f.write(code)
             sys.exit(1)
-        if primary:     # save original text of source code
-            self.code = code
+        ec_cache.put(file_name, code, safe_locals)
         return eb
 
     def find_language_version(self, eb):
@@ -163,55 +213,36 @@ class FrameWork:
         else:
             self.language = None
 
-    def build_eb_header_constant(self):
-        """ build a string of constants from the EasyConfig file
+    def build_eb_globals(self):
+        """ build the mapping of EasyBuild template and easyconfig constants that
+        an EasyConfig file can use, values are strings
         """
-        header = ''
+        eb_globals = {}
         for constant in TEMPLATE_CONSTANTS:
-            header += f'{constant[0]} = "{constant[1]}"\n'
+            eb_globals[constant[0]] = str(constant[1])
         for constant in EASYCONFIG_CONSTANTS:
-            header += f'{constant} = "{EASYCONFIG_CONSTANTS[constant]}"\n'
-        return header
+            eb_globals[constant] = str(EASYCONFIG_CONSTANTS[constant])
+        return eb_globals
 
     def find_easyconfig_paths(self, filename):
         """find the paths to EasyConfigs, search within the path given by the easyconfig
         given to update. Search for eb command
         """
-        userPath = os.path.expanduser(filename)
-        fullPath = os.path.abspath(userPath)
-        (head, tail) = os.path.split(fullPath)
-        local_path = None
-        while tail:
-            if 'easyconfigs' in tail:
-                local_path = os.path.join(head, tail)
-                self.base_paths.append(local_path)
-                logging.debug('local path to easyconfigs: {}'.format(local_path))
-                break
-            (head, tail) = os.path.split(head)
-        if local_path is None:
-            logging.error('You are not working in an EB repository, Quiting because I can not find dependancies.')
-            sys.exit(1)
-        eb_root = os.getenv('EBROOTEASYBUILD')
-        if eb_root is None:
-            logging.error('$EBROOTEASYBUILD environment variable must be defined.')
-            sys.exit(1)
-        else:
-            self.base_paths.append(os.path.join(eb_root, 'easybuild/easyconfigs'))
-        logging.debug("easyconfig search paths: %s", self.base_paths)
+        self.base_paths.extend(easyconfig_search_paths(filename))
 
     def find_easyconfig(self, name, easyconfigs):
-        """ search base_paths for easyconfig filename """
-        found = None
+        """ search base_paths for easyconfig filename, using the easyconfig index
+        of each base path
+        """
         first_letter = easyconfigs[0][0].lower()
+        narrow = os.path.join(first_letter, name)
         for easyconfig in easyconfigs:
             for ec_dir in self.base_paths:
-                narrow = os.path.join(ec_dir, first_letter, name)
-                logging.debug('find_easyconfig: search for %s in %s ', easyconfig, narrow)
-                for root,d,f in os.walk(narrow):
-                    for filename in f:
-                        if filename == easyconfig:
-                            found = os.path.join(root,filename)
-                            return found
+                logging.debug('find_easyconfig: search for %s in %s ', easyconfig,
+                              os.path.join(ec_dir, narrow))
+                found = get_index(ec_dir).find(easyconfig, narrow)
+                if found:
+                    return found
         return None
 
     def build_dep_filename(self, dep):
@@ -262,6 +293,7 @@ class FrameWork:
                 dep_filenames.append('{}-{}.eb'.format(prefix, tc))
         return dep_filenames
 
+    @phase('search_dependencies')
     def search_dependencies(self, dependencies):
         """ inspect dependencies for R and Python easyconfigs,
         if found add the exts_list to the list of dependent
@@ -294,32 +326,14 @@ class FrameWork:
             logging.info("Warning: file name does not match easybuild module name.")
             logging.info("   file name: %s\n module name: %s", eb_name, self.modulename)
 
-    def write_chunk(self, indx):
-        self.out.write(self.code[self.ptr_head:indx])
-        self.ptr_head = indx
-
-    def remove_checksum(self):
-        """ remove checksum from exts_list entry
-        if the version is updated, the checksum is no longer valid
-        """
-        # print(f"== removing checksum from {self.code[self.ptr_head:self.ptr_head+20]}")
-        checksum_pattern = r"\s*'checksums':\s*\['[a-zA-Z0-9]{64}'\],.*"
-        end_index = self.code[self.ptr_head:].find('),') + self.ptr_head + 3
-        if end_index == -1:
-            logging.error("No checksum found in exts_list entry")
-            sys.exit(1)
-        if "'checksums':" not in self.code[self.ptr_head:end_index]:
-            self.write_chunk(end_index)
-        else:
-            new_body = re.sub(checksum_pattern, '', self.code[self.ptr_head:end_index])
-            self.out.write(new_body)
-            self.ptr_head = end_index
-
     def output_module(self, lang, pkg):
         """write exts_list entry
         """
         output = None
-        if lang == 'R':
+        if lang == 'R' and pkg.get('spec'):
+            # entry moved ahead of the package that requires it, keep its options
+            output = self.python_output_module(pkg)
+        elif lang == 'R':
             output = "%s('%s', '%s')," % (self.indent, pkg['name'], pkg['version'])
         elif lang == 'Python':
             # TODO all the python should should be in UpdatePython
@@ -331,7 +345,7 @@ class FrameWork:
     def python_output_module(self, pkg):
         """Python version"""
         pkg_fmt = self.indent + "('{}', '{}', {{\n"
-        item_fmt = self.indent + self.indent + "'%s': %s,\n"
+        item_fmt = self.indent + self.indent + "'%s': %r,\n"
         if 'spec' in pkg:
             output = pkg_fmt.format(pkg['name'], pkg['version'])
             for item in pkg['spec'].keys():
@@ -341,76 +355,42 @@ class FrameWork:
             output = "('{}', '{}),".format(pkg['name'], pkg['version'])
         return output
 
-    def rewrite_extension_name(self, pkg):
-        """ rewrite exts_list 'name' without change """
-        target = f"'{pkg['name']}', "
-        logging.debug("target: %s body: %s", target, self.code[self.ptr_head:self.ptr_head+50])
-        name_index = self.code[self.ptr_head:].find(target)
-        if name_index == -1:
-            logging.error('No name found for %s', pkg['name'])
-            sys.exit(1)
-        self.write_chunk(name_index+self.ptr_head+len(target))
-        # self.ptr_head += len(target)
-
-    def rewrite_extension(self, pkg):
-        """ rewrite exts_list entry without change """
-        self.rewrite_extension_name(pkg)
-        end_index = self.code[self.ptr_head:].find('),')
-        self.write_chunk(self.ptr_head+end_index+3)
-
-    def update_extension(self, pkg):
-        """ rewrite exts_list entry with updated version """
-        logging.debug("name: %s version: %s body: >%s<", pkg["name"], pkg["version"],
-                      self.code[self.ptr_head:self.ptr_head+20])
-        self.rewrite_extension_name(pkg)
-        orig_string = f"'{pkg['orig_version']}', "
-        orig_ver_index = self.code[self.ptr_head:].find(orig_string)
-        if orig_ver_index == -1:
-            logging.error("No version found for %s body: %s",
-                          pkg['name'], self.code[self.ptr_head:self.ptr_head+20])
-            sys.exit(1)
-        new_version = f"'{pkg['version']}', "
-        self.out.write(new_version)
-        self.ptr_head += len(orig_string)
-        self.remove_checksum()
-
+    @phase('print_update')
     def print_update(self, lang, exts_processed):
-        """ this needs to be re-written in a Pythonesque manor
-        if module name matches extension name then skip
+        """ write the easyconfig with the updated exts_list to <easyconfig>.update
+        exts_list is located once with exts_spans; records that are not added map to the
+        entries of exts_list in order. Unchanged entries are written through as is.
         """
-        indx = self.code.find('exts_list = [\n')
-        self.write_chunk(indx + 14)
-
+        parsed = parse_exts_list(self.code)
+        if parsed is None:
+            logging.error('exts_list not found in %s', self.easyconfig)
+            sys.exit(1)
+        body_start, entries = parsed
+        # string entries (R base libraries) are not in exts_processed
+        entries = iter(entry for entry in entries if entry.is_tuple)
+        writer = ExtsListWriter(self.code, self.out, body_start)
         for extension in exts_processed:
-            ptr = self.ptr_head
-            logging.debug("extension: %s body: %s", extension['name'], self.code[ptr:ptr+32])
             name = extension['name']
             if 'action' not in extension:
                 logging.error('No action for library %s', name)
                 sys.exit(1)
-            if lang.lower() == lang:
-                # special case for bundles, if "name" is used in exts_list
-                indx = self.code[self.ptr_head:].find('),') + 2
-                indx += self.ptr_head
-                self.write_chunk(indx)
-            elif extension['from'] == 'base':  # R base library with no version
-                indx = self.code[self.ptr_head:].find(f"'{name}',")
-                indx += self.ptr_head + len(name) + 3
-                self.write_chunk(indx)
-            elif extension['action'] == 'keep':
-                self.rewrite_extension(extension)
-            elif extension['action'] == 'update':
-                self.update_extension(extension)
-            elif extension['action'] in ['processed', 'duplicate', 'reordered']:
-                print(f"== extension {name} is {extension['action']}, skipping")
-                name_indx = self.code[self.ptr_head:].find(f"'{name}', ")
-                name_indx += self.ptr_head + len(name) + 4
-                indx = self.code[name_indx:].find('),') + name_indx + 3
-                self.ptr_head = indx
-            elif extension['action'] in ['add', 'dep']:
-                output = self.output_module(lang, extension)
-                self.out.write("%s\n" % output)
-        self.out.write(self.code[self.ptr_head:])
+            action = extension['action']
+            if action in ['add', 'dep']:
+                writer.insert("%s\n" % self.output_module(lang, extension))
+                continue
+            entry = next(entries, None)
+            if entry is None:
+                logging.error('No exts_list entry for library %s', name)
+                sys.exit(1)
+            logging.debug("extension: %s entry: %s", name, self.code[entry.start:entry.start+32])
+            if action == 'keep':
+                writer.keep(entry)
+            elif action == 'update':
+                writer.update(entry, extension['version'])
+            elif action in ['processed', 'duplicate', 'reordered']:
+                print(f"== extension {name} is {action}, skipping")
+                writer.remove(entry)
+        writer.finish()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+    marker.py parses PEP 508 requirement strings from requires_dist and
+    evaluates their markers, for one or more target Python versions at once.
+    The same strings ('numpy>=1.21', "pytest; extra == 'test'") appear in
+    many packages, so each string is parsed once and each marker evaluated
+    once per environment for the life of the process.
+"""
+
+import re
+import logging
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+_requirements = {}      # requirement string: (name, marker string or None, Marker)
+_evaluated = {}         # (marker string, environment key): bool
+_python_versions = []
+
+
+def configure(python_versions=None):
+    """ additional Python versions (3.12) requires_dist is evaluated for, besides the
+    Python version of the easyconfig
+    """
+    global _python_versions
+    _python_versions = list(python_versions or [])
+
+
+def get_python_versions():
+    return _python_versions
+
+
+def parse_python_versions(value):
+    """ list of Python versions from a comma separated string, ValueError if one is not major.minor """
+    versions = [version.strip() for version in value.split(',') if version.strip()]
+    for version in versions:
+        if not re.fullmatch(r'\d+\.\d+', version):
+            raise ValueError(version)
+    return versions
+
+
+def parse(requirement):
+    """ (name, marker string, Marker) of a requirement string, marker is None without a marker """
+    parsed = _requirements.get(requirement)
+    if parsed is None:
+        from packaging.requirements import Requirement   # not needed by --exts-search-pypi
+        require = Requirement(requirement)
+        parsed = (require.name, str(require.marker) if require.marker else None, require.marker)
+        _requirements[requirement] = parsed
+    return parsed
+
+
+def environment_key(environment):
+    return tuple(sorted(environment.items()))
+
+
+def evaluate(marker_string, marker, environment, key=None):
+    """ result of marker for environment. key is environment_key(environment) """
+    cache_key = (marker_string, key or environment_key(environment))
+    result = _evaluated.get(cache_key)
+    if result is None:
+        result = marker.evaluate(environment)
+        _evaluated[cache_key] = result
+    return result
+
+
+def evaluate_requires(requires_dist, environments):
+    """ [(name, [required in each environment])] for the requirements of requires_dist, in order """
+    keys = [environment_key(environment) for environment in environments]
+    results = []
+    for requirement in requires_dist:
+        name, marker_string, marker = parse(requirement)
+        if marker is None:
+            results.append((name, [True] * len(environments)))
+        else:
+            results.append((name, [evaluate(marker_string, marker, environment, key)
+                                   for environment, key in zip(environments, keys)]))
+    return results
+
+
+def clear():
+    """ drop the parsed requirements and marker results """
+    _requirements.clear()
+    _evaluated.clear()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+
+"""
+    metadata_cache.py provides a persistent on-disk cache for the HTTP
+    metadata lookups made against PyPI, CRAN and Bioconductor.
+
+    Responses are stored by URL. Fresh entries are served from disk, stale
+    entries are revalidated with ETag/Last-Modified, 404 responses are
+    cached for a shorter time and the cache is kept below a size cap by
+    evicting the least recently used entries. Long running processes can
+    also keep responses in memory (memory=True).
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+import network
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+DEFAULT_TTL = 24 * 3600          # seconds a 200 response is considered fresh
+NEGATIVE_TTL = 3600              # seconds a 404 response is considered fresh
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """ ~/.cache/easy_update or $XDG_CACHE_HOME/easy_update """
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.path.join(cache_home, 'easy_update')
+
+
+class Headers(dict):
+    """ response headers with case insensitive lookup """
+    def __init__(self, headers=None):
+        super().__init__((key.lower(), value) for key, value in (headers or {}).items())
+
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+class CachedResponse:
+    """ The parts of requests.Response that easy_update uses:
+    status_code, headers, content, text and json()
+    """
+    def __init__(self, url, status_code, content, headers, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = Headers(headers)
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class MetadataCache:
+    """ URL keyed response cache.
+    Each entry is two files in cache_dir/http: <key>.json holds the url, status,
+    validators and time stored; <key>.body holds the response body.
+    The mtime of the .json file records the last access for LRU eviction.
+    memory=True keeps up to memory_bytes of responses in memory in front of the disk.
+    """
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL,
+                 max_bytes=DEFAULT_MAX_BYTES, enabled=True, refresh=False,
+                 memory=False, memory_bytes=DEFAULT_MEMORY_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.http_dir = os.path.join(self.cache_dir, 'http')
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.lock = threading.Lock()
+        self.total_bytes = None  # computed on first store
+        self.memory = OrderedDict() if memory else None    # key: (meta, body)
+        self.memory_bytes = memory_bytes
+        self.memory_used = 0
+
+    def get(self, url, timeout=None, headers=None):
+        """ GET url, answering from the cache when possible. headers are sent with the
+        request, they must not change the response of url between runs
+        """
+        if not self.enabled:
+            resp = network.get_client().get(url, headers=headers, timeout=timeout)
+            return CachedResponse(url, resp.status_code, resp.content, dict(resp.headers))
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        entry = self._recall(key)
+        if entry and self._is_fresh(entry[0]) and not self.refresh:
+            self.hits += 1
+            return CachedResponse(url, entry[0]['status'], entry[1], entry[0]['headers'], from_cache=True)
+        meta = self._load_meta(key)
+        headers = dict(headers or {})
+        if meta:
+            if self._is_fresh(meta) and not self.refresh:
+                body = self._load_body(key)
+                if body is not None:
+                    self.hits += 1
+                    self._touch(key)
+                    self._remember(key, meta, body)
+                    logging.debug('metadata cache hit: %s', url)
+                    return CachedResponse(url, meta['status'], body, meta['headers'], from_cache=True)
+            if meta['status'] == 200:
+                if meta['headers'].get('ETag'):
+                    headers['If-None-Match'] = meta['headers']['ETag']
+                if meta['headers'].get('Last-Modified'):
+                    headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        self.misses += 1
+        client = network.get_client()
+        resp = client.get(url, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and meta:
+            body = self._load_body(key)
+            if body is not None:
+                self.revalidated += 1
+                logging.debug('metadata cache revalidated: %s', url)
+                meta['stored'] = time.time()
+                self._write_meta(key, meta)
+                self._remember(key, meta, body)
+                return CachedResponse(url, meta['status'], body, meta['headers'], from_cache=True)
+            headers.pop('If-None-Match', None)
+            headers.pop('If-Modified-Since', None)
+            resp = client.get(url, headers=headers, timeout=timeout)
+        response = CachedResponse(url, resp.status_code, resp.content, dict(resp.headers))
+        if resp.status_code in (200, 404):
+            self._store(key, response)
+        return response
+
+    def head(self, url, timeout=None):
+        """ HEAD url, never cached. Used to check Last-Modified of large files """
+        resp = network.get_client().head(url, timeout=timeout)
+        return CachedResponse(url, resp.status_code, b'', dict(resp.headers))
+
+    def _recall(self, key):
+        """ (meta, body) from the memory tier or None """
+        if self.memory is None:
+            return None
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry:
+                self.memory.move_to_end(key)
+            return entry
+
+    def _remember(self, key, meta, body):
+        """ keep a response in the memory tier, dropping the least recently used """
+        if self.memory is None:
+            return
+        with self.lock:
+            if key in self.memory:
+                self.memory_used -= len(self.memory.pop(key)[1])
+            self.memory[key] = (meta, body)
+            self.memory_used += len(body)
+            while self.memory_used > self.memory_bytes and self.memory:
+                _, (_, old_body) = self.memory.popitem(last=False)
+                self.memory_used -= len(old_body)
+
+    def clear_memory(self):
+        """ drop the memory tier, the disk cache is not changed """
+        if self.memory is None:
+            return
+        with self.lock:
+            self.memory.clear()
+            self.memory_used = 0
+
+    def _is_fresh(self, meta):
+        ttl = self.ttl if meta['status'] == 200 else self.negative_ttl
+        return time.time() - meta['stored'] < ttl
+
+    def _paths(self, key):
+        return (os.path.join(self.http_dir, key + '.json'),
+                os.path.join(self.http_dir, key + '.body'))
+
+    def _load_meta(self, key):
+        meta_path, _ = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_body(self, key):
+        _, body_path = self._paths(key)
+        try:
+            with open(body_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _touch(self, key):
+        meta_path, _ = self._paths(key)
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+    def _write_atomic(self, path, data):
+        """ write to a temporary file and rename so concurrent readers never
+        see a partial file
+        """
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_meta(self, key, meta):
+        meta_path, _ = self._paths(key)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def _store(self, key, response):
+        """ save response and evict old entries if the cache is over max_bytes """
+        keep_headers = {h: response.headers[h] for h in ('ETag', 'Last-Modified', 'Content-Type')
+                        if h in response.headers}
+        meta = {'url': response.url, 'status': response.status_code,
+                'headers': keep_headers, 'stored': time.time()}
+        meta_path, body_path = self._paths(key)
+        self._remember(key, meta, response.content)
+        with self.lock:
+            try:
+                os.makedirs(self.http_dir, exist_ok=True)
+                if self.total_bytes is None:
+                    self.total_bytes = self._scan_size()
+                self.total_bytes -= self._entry_size(key)
+                self._write_atomic(body_path, response.content)
+                self._write_meta(key, meta)
+                self.total_bytes += self._entry_size(key)
+            except OSError as err:
+                logging.warning('metadata cache: can not write %s: %s', self.http_dir, err)
+                return
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entry_size(self, key):
+        size = 0
+        for path in self._paths(key):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _scan_size(self):
+        size = 0
+        with os.scandir(self.http_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    size += entry.stat().st_size
+        return size
+
+    def _evict(self):
+        """ remove least recently used entries until the cache is 90% of max_bytes """
+        entries = []
+        with os.scandir(self.http_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    entries.append((entry.stat().st_mtime, entry.name[:-5]))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        for _, key in entries:
+            if self.total_bytes <= target:
+                break
+            size = self._entry_size(key)
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.total_bytes -= size
+            logging.debug('metadata cache evict: %s', key)
+
+    def clear(self):
+        """ remove every entry from the cache """
+        self.clear_memory()
+        with self.lock:
+            if os.path.isdir(self.http_dir):
+                for name in os.listdir(self.http_dir):
+                    os.remove(os.path.join(self.http_dir, name))
+            self.total_bytes = 0
+
+
+_cache = None
+_fixtures = None
+_profiler = None
+
+
+def configure(cache_dir=None, enabled=True, refresh=False, **kwargs):
+    """ create the process wide cache used by http_get """
+    global _cache
+    _cache = MetadataCache(cache_dir=cache_dir, enabled=enabled, refresh=refresh, **kwargs)
+    return _cache
+
+
+def get_cache():
+    """ return the process wide cache, creating one with default settings """
+    if _cache is None:
+        configure()
+    return _cache
+
+
+def set_fixtures(store):
+    """ record responses to, or replay them from, a fixtures.FixtureStore. None turns it off """
+    global _fixtures
+    _fixtures = store
+
+
+def get_fixtures():
+    return _fixtures
+
+
+def set_profiler(profiler):
+    """ report every request to a profiler.Profiler. None turns it off """
+    global _profiler
+    _profiler = profiler
+
+
+def send(method, url, request):
+    """ run request() through the fixture store and the profiler, when they are set """
+    if _profiler is None:
+        return _fixtures.request(method, url, request) if _fixtures else request()
+    start = time.perf_counter()
+    response = _fixtures.request(method, url, request) if _fixtures else request()
+    _profiler.record_request(url, response, time.perf_counter() - start)
+    return response
+
+
+def http_get(url, timeout=None, headers=None):
+    """ GET url through the process wide metadata cache """
+    if _fixtures or _profiler:
+        return send('GET', url, lambda: get_cache().get(url, timeout=timeout, headers=headers))
+    return get_cache().get(url, timeout=timeout, headers=headers)
+
+
+def http_head(url, timeout=None):
+    """ HEAD url, the response is not cached """
+    if _fixtures or _profiler:
+        return send('HEAD', url, lambda: get_cache().head(url, timeout=timeout))
+    return get_cache().head(url, timeout=timeout)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+"""
+    network.py is the HTTP client used for every PyPI, CRAN and Bioconductor
+    request. One requests.Session per process keeps connections to each host
+    open (keep-alive) and asks for gzip compressed responses.
+
+    Every request has a timeout; --deadline limits the time of all requests of
+    a run. Connection errors, timeouts and 5xx responses are retried with
+    exponential backoff and jitter. When a request can not be completed the
+    error is logged and the run stops.
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import threading
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+DEFAULT_TIMEOUT = 30        # seconds to connect and between bytes of a response
+DEFAULT_RETRIES = 3         # attempts after the first one
+DEFAULT_BACKOFF = 0.5       # seconds before the first retry, doubled for each retry
+MAX_BACKOFF = 30
+POOL_SIZE = 16              # connections kept per host, enough for --jobs and the archive checks
+RETRY_STATUS = (429, 500, 502, 503, 504)
+USER_AGENT = 'easy_update (+https://github.com/fizwit/easyupdate)'
+
+
+def get_requests():
+    """ requests is imported on the first network access, a command answered
+    from the cache does not pay for importing it
+    """
+    import requests
+    return requests
+
+
+class HttpClient:
+    """ timeout: seconds for each request
+        retries: attempts after the first one for connection errors, timeouts and RETRY_STATUS
+        deadline: seconds for all requests made by the client, None for no limit
+    """
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, deadline=None,
+                 backoff=DEFAULT_BACKOFF):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.set_deadline(deadline)
+        self.session = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.retried = 0
+
+    def set_deadline(self, deadline):
+        self.deadline = deadline
+        self.deadline_at = time.monotonic() + deadline if deadline else None
+
+    def get_session(self):
+        """ the Session of this process. Forked processes (batch workers) must not
+        share the connections of their parent, they open their own
+        """
+        with self.lock:
+            if self.session is None or self.pid != os.getpid():
+                requests = get_requests()
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({'Accept-Encoding': 'gzip, deflate', 'User-Agent': USER_AGENT})
+                self.session = session
+                self.pid = os.getpid()
+            return self.session
+
+    def remaining(self):
+        """ seconds left before the deadline, None without a deadline """
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at - time.monotonic()
+
+    def request(self, method, url, headers=None, timeout=None):
+        """ return the requests.Response for method and url """
+        requests = get_requests()
+        session = self.get_session()
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            remaining = self.remaining()
+            if remaining is not None and remaining <= 0:
+                logging.error('deadline of %ss reached before %s %s', self.deadline, method, url)
+                sys.exit(1)
+            try:
+                response = session.request(method, url, headers=headers, allow_redirects=True,
+                                           timeout=min(timeout, remaining) if remaining else timeout)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if attempt >= self.retries:
+                    logging.error('%s %s failed after %d attempts: %s', method, url, attempt + 1, err)
+                    sys.exit(1)
+                error = err
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUS or attempt >= self.retries:
+                    return response
+                error = f'HTTP {response.status_code}'
+            delay = self.retry_delay(attempt, response)
+            logging.warning('%s %s: %s, retry in %.1fs', method, url, error, delay)
+            with self.lock:
+                self.retried += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def retry_delay(self, attempt, response=None):
+        """ exponential backoff with full jitter, or Retry-After when the server sends it """
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(0, min(self.backoff * 2 ** attempt, MAX_BACKOFF))
+        remaining = self.remaining()
+        if remaining is not None:
+            delay = max(min(delay, remaining), 0)
+        return delay
+
+    def get(self, url, headers=None, timeout=None):
+        return self.request('GET', url, headers=headers, timeout=timeout)
+
+    def head(self, url, timeout=None):
+        return self.request('HEAD', url, timeout=timeout)
+
+
+_client = None
+
+
+def configure(timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, deadline=None):
+    """ set up the process wide client. Open connections are kept """
+    global _client
+    if _client is None:
+        _client = HttpClient(timeout=timeout, retries=retries, deadline=deadline)
+    else:
+        _client.timeout = timeout
+        _client.retries = retries
+        _client.set_deadline(deadline)
+    return _client
+
+
+def get_client():
+    """ return the process wide client, creating one with default settings """
+    if _client is None:
+        configure()
+    return _client
+
+
+def settings():
+    """ arguments of configure() for the process wide client, used by batch workers """
+    client = get_client()
+    return (client.timeout, client.retries, client.remaining())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""
+    prefetch.py fetches package metadata for a whole dependency tree with a
+    bounded thread pool. Requests for the same package are coalesced into a
+    single future, so the serial dependency walk in UpdateExts can ask for
+    any package and block only if it has not arrived yet.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+
+class Prefetcher:
+    """ fetch(name) returns the metadata for one package.
+    requires(name, metadata) returns the names of the packages it depends on.
+    Names in exclude are never fetched while walking the tree.
+    """
+    def __init__(self, fetch, requires, jobs, exclude=None):
+        self.fetch = fetch
+        self.requires = requires
+        self.exclude = set(exclude or [])
+        self.pool = ThreadPoolExecutor(max_workers=jobs)
+        self.futures = {}
+        self.lock = threading.Lock()
+
+    def submit(self, name):
+        """ return (future, new) for name, new is False if the request is already in flight """
+        with self.lock:
+            if name in self.futures:
+                return self.futures[name], False
+            future = self.pool.submit(self.fetch, name)
+            self.futures[name] = future
+            return future, True
+
+    def get(self, name):
+        """ block until the metadata for name is available """
+        future, _ = self.submit(name)
+        return future.result()
+
+    def walk(self, names):
+        """ fetch names and every dependency reachable from them, breadth first """
+        pending = {}
+        for name in names:
+            future, new = self.submit(name)
+            if new:
+                pending[future] = name
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                if future.exception():
+                    logging.debug('prefetch %s failed: %s', name, future.exception())
+                    continue
+                for dep in self.requires(name, future.result()):
+                    if dep in self.exclude:
+                        continue
+                    dep_future, new = self.submit(dep)
+                    if new:
+                        pending[dep_future] = dep
+        return len(self.futures)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+"""
+    profiler.py collects the numbers printed by --profile: wall time of each
+    phase (parse_eb, search_dependencies, Bioconductor and CRAN index loading,
+    updateexts, print_update), requests, bytes and latency per host, metadata
+    cache hits and the packages that took longest to look up.
+
+    Phases are marked with 'with phase(name):' or '@phase(name)', nothing is
+    recorded unless enable() was called. Phases can be nested, a phase includes
+    the time of the phases and requests inside it.
+"""
+
+import sys
+import json
+import math
+import time
+import logging
+import threading
+import contextlib
+from urllib.parse import urlsplit
+import metadata_cache
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+PERCENTILES = (50, 90, 99)
+
+
+class Profiler:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = {}        # name: [seconds, count]
+        self.hosts = {}         # host: {'requests', 'cached', 'bytes', 'latencies'}
+        self.packages = {}      # name: seconds spent in get_package_info
+
+    def add_phase(self, name, seconds, count=1):
+        with self.lock:
+            total = self.phases.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += count
+
+    def add_package(self, name, seconds):
+        with self.lock:
+            self.packages[name] = self.packages.get(name, 0.0) + seconds
+
+    def record_request(self, url, response, seconds):
+        """ called by metadata_cache for each http_get/http_head """
+        host = urlsplit(url).netloc or 'local'
+        with self.lock:
+            stats = self.hosts.setdefault(host, {'requests': 0, 'cached': 0, 'bytes': 0, 'latencies': []})
+            stats['requests'] += 1
+            stats['bytes'] += len(response.content)
+            stats['latencies'].append(seconds)
+            if getattr(response, 'from_cache', False):
+                stats['cached'] += 1
+
+    def take(self):
+        """ return the data collected so far and start again. Used by batch workers,
+        the parent process merges the data of every easyconfig
+        """
+        with self.lock:
+            data = {'phases': self.phases, 'hosts': self.hosts, 'packages': self.packages}
+            self.phases, self.hosts, self.packages = {}, {}, {}
+        return data
+
+    def merge(self, data):
+        with self.lock:
+            for name, (seconds, count) in data['phases'].items():
+                total = self.phases.setdefault(name, [0.0, 0])
+                total[0] += seconds
+                total[1] += count
+            for host, stats in data['hosts'].items():
+                total = self.hosts.setdefault(host, {'requests': 0, 'cached': 0, 'bytes': 0, 'latencies': []})
+                for key in ('requests', 'cached', 'bytes', 'latencies'):
+                    total[key] += stats[key]
+            for name, seconds in data['packages'].items():
+                self.packages[name] = self.packages.get(name, 0.0) + seconds
+
+    def report(self, top=10):
+        """ the profile as a dictionary, latencies are summarized as percentiles """
+        hosts = {}
+        for host, stats in sorted(self.hosts.items()):
+            latencies = sorted(stats['latencies'])
+            hosts[host] = {'requests': stats['requests'], 'cache_hits': stats['cached'],
+                           'cache_misses': stats['requests'] - stats['cached'], 'bytes': stats['bytes']}
+            for percentile in PERCENTILES:
+                hosts[host][f'p{percentile}'] = percentile_of(latencies, percentile)
+            hosts[host]['max'] = latencies[-1] if latencies else 0.0
+        slowest = sorted(self.packages.items(), key=lambda item: -item[1])[:top]
+        return {'wall': time.perf_counter() - self.start,
+                'phases': {name: {'seconds': seconds, 'count': count}
+                           for name, (seconds, count) in self.phases.items()},
+                'hosts': hosts,
+                'packages': len(self.packages),
+                'slowest_packages': [{'name': name, 'seconds': seconds} for name, seconds in slowest]}
+
+    def print_report(self, top=10, out=sys.stdout):
+        report = self.report(top)
+        print(f"== profile: {report['wall']:.2f}s wall", file=out)
+        print(f"   {'phase':24} {'seconds':>9} {'count':>7}", file=out)
+        for name, phase_stats in report['phases'].items():
+            print(f"   {name:24} {phase_stats['seconds']:9.3f} {phase_stats['count']:7}", file=out)
+        if report['hosts']:
+            print(f"   {'host':32} {'requests':>8} {'cached':>7} {'missed':>7} {'MiB':>7} "
+                  + ' '.join(f"{f'p{p} ms':>8}" for p in PERCENTILES) + f" {'max ms':>8}", file=out)
+            for host, stats in report['hosts'].items():
+                print(f"   {host:32} {stats['requests']:8} {stats['cache_hits']:7} {stats['cache_misses']:7} "
+                      f"{stats['bytes'] / 2**20:7.2f} "
+                      + ' '.join(f"{stats[f'p{p}'] * 1000:8.1f}" for p in PERCENTILES)
+                      + f" {stats['max'] * 1000:8.1f}", file=out)
+        if report['slowest_packages']:
+            print(f"   slowest of {report['packages']} packages:", file=out)
+            for package in report['slowest_packages']:
+                print(f"   {package['name']:32} {package['seconds'] * 1000:8.1f} ms", file=out)
+
+    def write_json(self, filename, top=10):
+        with open(filename, 'w') as f:
+            json.dump(self.report(top), f, indent=2)
+
+
+def percentile_of(values, percentile):
+    """ nearest rank percentile of sorted values """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(percentile / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+_profiler = None
+
+
+def enable():
+    """ start collecting, returns the process wide Profiler """
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+        metadata_cache.set_profiler(_profiler)
+    return _profiler
+
+
+def get_profiler():
+    """ the process wide Profiler, None when --profile is not used """
+    return _profiler
+
+
+@contextlib.contextmanager
+def phase(name):
+    """ add the wall time of the block to phase name """
+    if _profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profiler.add_phase(name, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def package(name):
+    """ add the wall time of the block to package name """
+    if _profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profiler.add_package(name, time.perf_counter() - start)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""
+    pypi_json.py reads the parts of a PyPI JSON API document
+    (/pypi/<name>/json) that easy_update uses: 'info', 'urls' and the files of
+    the latest release from 'releases'. json.loads() would build dictionaries
+    for every file of every release, tens of MB for projects like boto3 with
+    thousands of releases; here the releases are decoded one at a time and
+    all but the latest one dropped at once, so memory does not grow with the
+    release history of a project.
+"""
+
+import re
+import json
+import logging
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def skip_ws(text, pos):
+    return _WHITESPACE.match(text, pos).end()
+
+
+def skip_value(text, pos):
+    """ position after the JSON value at pos. The value is decoded and dropped at once,
+    only one value that is skipped is in memory at any time
+    """
+    return _decoder.raw_decode(text, pos)[1]
+
+
+def scan_object(text, pos, member):
+    """ call member(key, position of the value) for each member of the object at pos,
+    member returns the position after the value. Returns the position after the object
+    """
+    if text[pos] != '{':
+        raise ValueError(f'expected an object at {pos}')
+    pos = skip_ws(text, pos + 1)
+    if text[pos] == '}':
+        return pos + 1
+    while True:
+        key, pos = _decoder.raw_decode(text, pos)
+        pos = skip_ws(text, pos)
+        if text[pos] != ':':
+            raise ValueError(f"expected ':' at {pos}")
+        pos = skip_ws(text, member(key, skip_ws(text, pos + 1)))
+        if text[pos] == '}':
+            return pos + 1
+        if text[pos] != ',':
+            raise ValueError(f"expected ',' at {pos}")
+        pos = skip_ws(text, pos + 1)
+
+
+def load_project(content):
+    """ {'info', 'releases', 'urls'} of a PyPI project document, 'releases' has only
+    the release named by info['version']
+    """
+    text = content.decode('utf-8') if isinstance(content, bytes) else content
+    project = {'releases': {}}
+    releases_at = []
+
+    def release(key, pos):
+        if key == project['info'].get('version'):
+            project['releases'][key], end = _decoder.raw_decode(text, pos)
+            return end
+        return skip_value(text, pos)
+
+    def top_level(key, pos):
+        if key in ('info', 'urls'):
+            project[key], end = _decoder.raw_decode(text, pos)
+            return end
+        if key == 'releases':
+            if 'info' in project:
+                return scan_object(text, pos, release)
+            releases_at.append(pos)
+            return scan_object(text, pos, lambda key, pos: skip_value(text, pos))
+        return skip_value(text, pos)
+
+    scan_object(text, skip_ws(text, 0), top_level)
+    # PyPI sends 'info' first, otherwise the releases are read once the version is known
+    if releases_at and 'info' in project:
+        scan_object(text, releases_at[0], release)
+    return project
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""
+    pypi_mirror.py answers PyPI lookups from a local mirror, for build nodes
+    without internet access. The mirror is a bandersnatch directory (with a
+    web/ directory) or a simple index directory, given as a path or a file://
+    URL:
+
+        web/json/<name>                 PyPI JSON API document (bandersnatch json = true)
+        web/pypi/<name>/json            the same, as linked by bandersnatch
+        web/simple/<name>/index.v1_json PEP 691 project page, or index.html (PEP 503)
+        web/packages/.../<file>.metadata  core metadata of a distribution (PEP 658)
+
+    A project is read from its JSON document when there is one, otherwise from
+    its project page and the .metadata file of the latest release. Names are
+    looked up as given and normalized (PEP 503); a directory is listed only
+    when neither is found, at most once.
+"""
+
+import os
+import sys
+import logging
+import threading
+from urllib.parse import urlsplit
+from metadata_cache import CachedResponse
+import pypi_json
+import pypi_simple
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+PAGES = (('index.v1_json', 'application/vnd.pypi.simple.v1+json'),
+         ('index.html', 'text/html'))
+
+
+def file_path(location):
+    """ local path of a path or file:// URL """
+    if location.startswith('file:'):
+        from urllib.request import url2pathname   # urllib.request loads http.client and email
+        location = url2pathname(urlsplit(location).path)
+    return os.path.abspath(os.path.expanduser(location))
+
+
+class LocalMirror:
+    """ location: mirror directory, its web/ or web/simple/ directory, or a file:// URL of one """
+    def __init__(self, location):
+        self.location = location
+        self.path = file_path(location)
+        web = self.path
+        if os.path.isdir(os.path.join(web, 'web')):
+            web = os.path.join(web, 'web')
+        elif os.path.basename(web) == 'simple':
+            web = os.path.dirname(web)
+        self.web = web
+        self.simple_dir = os.path.join(web, 'simple')
+        self.json_dir = os.path.join(web, 'json')
+        self.pypi_dir = os.path.join(web, 'pypi')
+        self.listings = {}      # directory: {normalized name: entry}
+        self.lock = threading.Lock()
+
+    def is_mirror(self):
+        return any(os.path.isdir(path) for path in (self.simple_dir, self.json_dir, self.pypi_dir))
+
+    def listing(self, directory):
+        """ {normalized name: entry} of directory, read on first use """
+        with self.lock:
+            if directory not in self.listings:
+                try:
+                    names = os.listdir(directory)
+                except OSError:
+                    names = []
+                self.listings[directory] = {pypi_simple.normalize(name): name for name in names}
+                logging.debug('mirror: %d names in %s', len(names), directory)
+            return self.listings[directory]
+
+    def find(self, directory, name, *suffix):
+        """ path of directory/<name>/<suffix> for name as given, normalized or listed, None if missing """
+        normalized = pypi_simple.normalize(name)
+        for entry in (name, normalized):
+            path = os.path.join(directory, entry, *suffix)
+            if os.path.isfile(path):
+                return path
+        entry = self.listing(directory).get(normalized)
+        if entry:
+            path = os.path.join(directory, entry, *suffix)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def get_project(self, name):
+        """ {'info', 'releases', 'urls'} as /pypi/<name>/json, 'not found' if the mirror does not have it """
+        path = self.find(self.json_dir, name) or self.find(self.pypi_dir, name, 'json')
+        if path:
+            with open(path, 'rb') as f:
+                return pypi_json.load_project(f.read())
+        for page, content_type in PAGES:
+            path = self.find(self.simple_dir, name, page)
+            if path:
+                from urllib.request import pathname2url
+                with open(path, 'rb') as f:
+                    response = CachedResponse('file://' + pathname2url(path), 200, f.read(),
+                                              {'Content-Type': content_type})
+                project = pypi_simple.project_from_page(name, pypi_simple.parse_project_page(response),
+                                                        read_metadata)
+                if project:
+                    return project
+                logging.error('mirror %s has no metadata for %s', self.location, name)
+                return 'not found'
+        logging.error('%s not found in mirror %s', name, self.location)
+        return 'not found'
+
+
+def read_metadata(url):
+    """ content of the .metadata file next to the distribution at a file:// url """
+    try:
+        with open(file_path(url) + '.metadata', 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+_mirror = None
+
+
+def configure(location=None):
+    """ answer PyPI lookups from the mirror at location, None for PyPI.
+    The mirror and its listings are kept while location does not change
+    """
+    global _mirror
+    if not location:
+        _mirror = None
+    elif _mirror is None or _mirror.path != file_path(location):
+        mirror = LocalMirror(location)
+        if not mirror.is_mirror():
+            logging.error('%s is not a PyPI mirror: no simple, json or pypi directory', location)
+            sys.exit(1)
+        _mirror = mirror
+    return _mirror
+
+
+def get_mirror():
+    return _mirror
+
+
+def get_location():
+    return _mirror.path if _mirror else None
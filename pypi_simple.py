@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+"""
+    pypi_simple.py reads Python package metadata from the Simple Repository
+    API instead of the PyPI JSON API. The project page (PEP 691 JSON, or
+    PEP 503 HTML from mirrors) lists the files of every release; the latest
+    version and its sdist are picked from it, and Requires-Dist and Summary
+    are read from the .metadata file of a wheel (PEP 658/714). Neither
+    response contains the descriptions and file lists of all releases that
+    make /pypi/<name>/json large.
+
+    get_project() returns the fields of the PyPI JSON document that
+    updatePython uses, or None when the JSON API has to be used: the latest
+    release has no .metadata file, or the index serves none at all (older
+    mirrors), then the JSON API is used for the rest of the run.
+"""
+
+import os
+import re
+import json
+import logging
+from urllib.parse import urljoin, urldefrag
+from metadata_cache import http_get
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+SIMPLE_URL = os.environ.get('EASY_UPDATE_PYPI_SIMPLE_URL', 'https://pypi.org/simple')
+ACCEPT = ('application/vnd.pypi.simple.v1+json, application/vnd.pypi.simple.v1+html;q=0.2, '
+          'text/html;q=0.01')
+APIS = ('simple', 'json')
+
+_api = 'simple'
+
+
+def configure(api='simple'):
+    """ 'simple' reads the Simple API and .metadata files, 'json' only the PyPI JSON API """
+    global _api
+    _api = api
+
+
+def get_api():
+    return _api
+
+
+def normalize(name):
+    """ PEP 503 normalized project name """
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def parse_project_page(response):
+    """ list of files of a project page, each {'filename', 'url', 'core-metadata', 'yanked'},
+    urls are absolute and without the hash fragment
+    """
+    if 'json' in response.headers.get('Content-Type', ''):
+        files = json.loads(response.content)['files']
+    else:
+        files = parse_links(response.text)
+    for f in files:
+        f['url'] = urldefrag(urljoin(response.url, f['url']))[0]
+        if not f.get('filename'):
+            f['filename'] = f['url'].rsplit('/', 1)[-1]
+        f['core-metadata'] = bool(f.get('core-metadata', f.get('dist-info-metadata')))
+    return files
+
+
+def parse_links(html):
+    """ file links of a PEP 503 project page """
+    from html.parser import HTMLParser   # JSON pages and cached runs do not need it
+
+    class LinksParser(HTMLParser):
+        def __init__(self):
+            super().__init__()
+            self.files = []
+
+        def handle_starttag(self, tag, attrs):
+            if tag != 'a':
+                return
+            attrs = dict(attrs)
+            if 'href' not in attrs:
+                return
+            metadata = attrs.get('data-core-metadata', attrs.get('data-dist-info-metadata'))
+            self.files.append({'url': attrs['href'], 'filename': None,
+                               'core-metadata': metadata is not None and metadata != 'false',
+                               'yanked': 'data-yanked' in attrs})
+
+        def handle_data(self, data):
+            if self.files and self.files[-1]['filename'] is None:
+                self.files[-1]['filename'] = data.strip()
+
+    parser = LinksParser()
+    parser.feed(html)
+    return parser.files
+
+
+def file_release(filename):
+    """ (version, packagetype, python tag) of a distribution file name, None for other files """
+    from packaging.utils import (parse_wheel_filename, parse_sdist_filename,
+                                 InvalidWheelFilename, InvalidSdistFilename)
+    from packaging.version import InvalidVersion
+    try:
+        if filename.endswith('.whl'):
+            _, version, _, _ = parse_wheel_filename(filename)
+            return version, 'bdist_wheel', filename.split('-')[-3]
+        _, version = parse_sdist_filename(filename)
+        return version, 'sdist', 'source'
+    except (InvalidWheelFilename, InvalidSdistFilename, InvalidVersion):
+        return None
+
+
+def latest_release(files):
+    """ (version, files) of the newest release that is not a pre-release or yanked,
+    the newest pre-release when there is no final release
+    """
+    releases = {}
+    for f in files:
+        release = file_release(f['filename'])
+        if release is None or f.get('yanked'):
+            continue
+        version, packagetype, python_version = release
+        releases.setdefault(version, []).append(dict(f, packagetype=packagetype, python_version=python_version))
+    if not releases:
+        return None, []
+    final = [version for version in releases if not version.is_prerelease]
+    version = max(final or releases)
+    return version, releases[version]
+
+
+def metadata_file(files):
+    """ the file of a release to read .metadata from: a pure Python wheel, any wheel, the sdist """
+    with_metadata = [f for f in files if f['core-metadata']]
+    for f in with_metadata:
+        if f['filename'].endswith('-none-any.whl'):
+            return f
+    for f in with_metadata:
+        if f['packagetype'] == 'bdist_wheel':
+            return f
+    return with_metadata[0] if with_metadata else None
+
+
+def parse_metadata(content):
+    """ 'info' fields of the PyPI JSON API from a core metadata file """
+    from email.parser import BytesHeaderParser
+    message = BytesHeaderParser().parsebytes(content)
+    return {'name': message.get('Name'), 'version': message.get('Version'),
+            'summary': message.get('Summary', ''),
+            'requires_dist': message.get_all('Requires-Dist') or None,
+            'requires_python': message.get('Requires-Python'),
+            'classifiers': message.get_all('Classifier') or [],
+            'home_page': message.get('Home-page')}
+
+
+def get_project(name):
+    """ {'info', 'releases', 'urls'} like /pypi/<name>/json, with only the latest release.
+    'not found' when the project does not exist, None when the JSON API must be used
+    """
+    url = f"{SIMPLE_URL}/{normalize(name)}/"
+    resp = http_get(url, headers={'Accept': ACCEPT})
+    if resp.status_code == 404:
+        logging.error('API error: %s GET project %s', resp.status_code, name)
+        return 'not found'
+    if resp.status_code != 200:
+        logging.debug('simple API: %s GET %s, using the JSON API', resp.status_code, url)
+        return None
+    page = parse_project_page(resp)
+    if not any(f['core-metadata'] for f in page) and any(f['filename'].endswith('.whl') for f in page):
+        logging.info('%s does not serve .metadata files, using the JSON API', SIMPLE_URL)
+        configure('json')
+        return None
+    return project_from_page(name, page, read_metadata)
+
+
+def read_metadata(url):
+    """ content of the .metadata file of the distribution at url, None if it can not be read """
+    resp = http_get(url + '.metadata')
+    if resp.status_code != 200:
+        logging.debug('simple API: %s GET %s.metadata, using the JSON API', resp.status_code, url)
+        return None
+    return resp.content
+
+
+def project_from_page(name, page, read):
+    """ project of the latest release of the files of a project page, read(url) returns
+    the .metadata file of a distribution. None when there is no .metadata file
+    """
+    version, files = latest_release(page)
+    source = metadata_file(files)
+    if source is None:
+        logging.debug('simple API: no .metadata for %s %s, using the JSON API', name, version)
+        return None
+    content = read(source['url'])
+    if content is None:
+        return None
+    info = parse_metadata(content)
+    info['name'] = info['name'] or name
+    info['version'] = info['version'] or str(version)
+    release = [{'packagetype': f['packagetype'], 'python_version': f['python_version'],
+                'filename': f['filename'], 'url': f['url']} for f in files]
+    return {'info': info, 'releases': {info['version']: release}, 'urls': release}
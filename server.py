@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+
+"""
+    server.py runs easy_update as a long running process on a UNIX socket.
+    Bioconductor data, the CRAN index, the easyconfig indexes and recent
+    PyPI/CRAN responses stay in memory between requests, a command handed
+    to the server does not pay for loading them again.
+
+    easy_update.py --serve [socket] starts the server. Other easy_update.py
+    commands send their arguments to the server when --server, $EASY_UPDATE_SOCKET
+    or the default socket (<cache_dir>/server.sock) is found, and run locally
+    when it is not. Requests run one at a time; output is streamed back to the client.
+
+    Protocol: one JSON line from the client {'args', 'cwd', 'env'}, then JSON
+    lines from the server: {'out': text}, and last {'exit': status} or
+    {'declined': reason} when the client must run the command itself.
+"""
+
+import io
+import gc
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import logging
+import argparse
+import traceback
+import contextlib
+import socketserver
+import metadata_cache
+import network
+import pypi_mirror
+import marker
+import pypi_simple
+
+logger = logging.getLogger()
+
+__version__ = '0.1.0'
+__date__ = '2026-10-18'
+__author__ = 'John Dey'
+
+SOCKET_ENV = 'EASY_UPDATE_SOCKET'
+FORWARD_ENV = ('EBROOTEASYBUILD',)      # client environment used by the operations
+DEFAULT_MEMORY_LIMIT = 2048             # MB resident before the server restarts
+DEFAULT_IDLE_TIMEOUT = 30               # minutes without requests before warm data is dropped
+LOG_FORMAT = '%(levelname)s %(filename)s %(funcName)s:%(lineno)d - %(message)s'
+
+
+def default_socket_path(cache_dir=None):
+    return os.path.join(cache_dir or metadata_cache.default_cache_dir(), 'server.sock')
+
+
+def find_server(args):
+    """ socket of the server to hand the command to, or None to run locally """
+    if args.no_server:
+        return None
+    path = args.server or os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    path = default_socket_path(args.cache_dir)
+    return path if os.path.exists(path) else None
+
+
+def run_remote(socket_path, args):
+    """ run the command in the server, return the exit status or None if the
+    server is not available or declined the command
+    """
+    request_args = dict(vars(args))
+    value = args.value
+    is_file, operation = args.operation
+    # search values are package names, a directory of the same name must not be used
+    if value and (is_file or operation == 'update_batch') and os.path.exists(os.path.expanduser(value)):
+        request_args['value'] = os.path.abspath(os.path.expanduser(value))
+    request = {'args': request_args, 'cwd': os.getcwd(),
+               'env': {name: os.environ[name] for name in FORWARD_ENV if name in os.environ}}
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError as err:
+        log = logging.warning if args.server else logging.debug
+        log('easy_update server %s not available: %s', socket_path, err)
+        sock.close()
+        return None
+    with sock, sock.makefile('rb') as reader:
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        for line in reader:
+            message = json.loads(line)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'declined' in message:
+                logging.debug('easy_update server declined: %s', message['declined'])
+                return None
+            elif 'exit' in message:
+                return message['exit']
+    logging.error('easy_update server %s closed the connection', socket_path)
+    return 1
+
+
+class ClientWriter(io.TextIOBase):
+    """ file object for stdout and logging, sends text to the client as {'out': text} """
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.buffer = []
+        self.connected = True
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.buffer.append(text)
+        if '\n' in text:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            text = ''.join(self.buffer)
+            self.buffer = []
+            self.send(out=text)
+
+    def send(self, **message):
+        if not self.connected:
+            return
+        try:
+            self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+            self.wfile.flush()
+        except OSError:
+            # client went away, finish the request without output
+            self.connected = False
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return
+        writer = ClientWriter(self.wfile)
+        status = self.server.run_request(request, writer)
+        writer.flush()
+        if status is not None:
+            writer.send(exit=status)
+
+
+class Restart(Exception):
+    """ raised from serve_forever to replace the server by a new process """
+
+
+class EasyUpdateServer(socketserver.UnixStreamServer):
+    """ serves one request at a time. Warm data is dropped when no request arrived
+    for idle_timeout seconds. Memory freed by Python is rarely returned to the system,
+    a server over memory_limit bytes resident is replaced by a new process
+    """
+    def __init__(self, socket_path, memory_limit, idle_timeout):
+        super().__init__(socket_path, RequestHandler)
+        self.memory_limit = memory_limit
+        self.idle_timeout = idle_timeout
+        self.last_request = time.time()
+        self.warm = False
+        self.requests = 0
+        self.restart = False
+
+    def service_actions(self):
+        if self.restart:
+            raise Restart()
+        if self.warm and time.time() - self.last_request > self.idle_timeout:
+            logging.info('idle for %d seconds, dropping warm data', self.idle_timeout)
+            self.evict()
+
+    def declined(self, args):
+        """ reason the server can not run the command, or None """
+        cache = metadata_cache.get_cache()
+        if args.operation[1] == 'serve':
+            return 'server operation'
+        if args.record or args.replay:
+            return 'record and replay run in the client'
+        if args.profile or args.profile_json:
+            return 'profiles are collected in the client'
+        if args.no_cache == cache.enabled:
+            return 'metadata cache setting differs'
+        cache_dir = os.path.abspath(os.path.expanduser(args.cache_dir or metadata_cache.default_cache_dir()))
+        if cache_dir != os.path.abspath(cache.cache_dir):
+            return f'server uses cache directory {cache.cache_dir}'
+        return None
+
+    def run_request(self, request, writer):
+        import ec_index
+        import easy_update
+        args = argparse.Namespace(**request['args'])
+        args.operation = tuple(args.operation)
+        reason = self.declined(args)
+        if reason:
+            writer.send(declined=reason)
+            return None
+        self.requests += 1
+        start = time.time()
+        cwd = os.getcwd()
+        saved_env = {name: os.environ.get(name) for name in FORWARD_ENV}
+        cache = metadata_cache.get_cache()
+        handler = logging.StreamHandler(writer)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root = logging.getLogger()
+        level = root.level
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG if args.debug else logging.INFO)
+        is_file, operation = args.operation
+        try:
+            with contextlib.redirect_stdout(writer):
+                os.chdir(request['cwd'])
+                set_environment(request['env'])
+                cache.refresh = args.refresh
+                network.configure(timeout=args.timeout, retries=args.retries, deadline=args.deadline)
+                pypi_simple.configure(args.pypi_api)
+                pypi_mirror.configure(args.pypi_mirror)
+                marker.configure(args.python_versions)
+                ec_index.reset_checks()
+                status = easy_update.run_operation(is_file, operation, args.verbose, args.value,
+                                                   args.jobs, args.cran_index, args.processes)
+        except SystemExit as err:
+            status = exit_status(err.code, writer)
+        except Exception:
+            traceback.print_exc(file=writer)
+            status = 1
+        finally:
+            root.removeHandler(handler)
+            root.setLevel(level)
+            cache.refresh = False
+            os.chdir(cwd)
+            set_environment(saved_env)
+        logging.info('request %d: %s %s exit %s in %.2fs', self.requests, operation, args.value,
+                     status, time.time() - start)
+        self.last_request = time.time()
+        self.warm = True
+        rss = resident_bytes()
+        if rss and rss > self.memory_limit:
+            # restarted once the status is sent to the client
+            logging.info('resident memory %d MB is over the limit, restarting', rss // 2**20)
+            self.restart = True
+        return status
+
+    def evict(self):
+        """ drop the data kept between requests """
+        import ec_index
+        for name in ('bioconductor_packages', 'cran_packages'):
+            if name in sys.modules:
+                sys.modules[name].clear_instances()
+        metadata_cache.get_cache().clear_memory()
+        ec_index.clear_indexes()
+        marker.clear()
+        gc.collect()
+        self.warm = False
+
+
+def set_environment(env):
+    """ set the FORWARD_ENV variables to the values of env, remove those env does not have """
+    for name in FORWARD_ENV:
+        if env.get(name) is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = env[name]
+
+
+def exit_status(code, writer):
+    """ exit status of sys.exit(code) """
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=writer)
+    return 1
+
+
+def resident_bytes():
+    """ resident set size of this process, None where /proc is not available """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def serve(socket_path, args):
+    """ run the server until it is interrupted or terminated """
+    socket_path = os.path.abspath(os.path.expanduser(socket_path))
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            logging.error('an easy_update server is already listening on %s', socket_path)
+            sys.exit(1)
+        except OSError:
+            os.remove(socket_path)   # left over from a server that did not exit cleanly
+        finally:
+            probe.close()
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    command = [sys.executable, os.path.abspath(sys.argv[0])] + sys.argv[1:]
+    metadata_cache.configure(cache_dir=args.cache_dir, enabled=not args.no_cache, memory=True)
+    # the socket runs commands as this user, nobody else may connect
+    umask = os.umask(0o177)
+    try:
+        server = EasyUpdateServer(socket_path, args.server_memory * 2**20, args.server_idle * 60)
+    finally:
+        os.umask(umask)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"== easy_update server listening on {socket_path}", flush=True)
+    try:
+        server.serve_forever(poll_interval=1)
+    except (KeyboardInterrupt, Restart):
+        pass
+    finally:
+        import ec_index
+        ec_index.clear_indexes()
+        server.server_close()
+        os.remove(socket_path)
+        print(f"== easy_update server stopped after {server.requests} requests", flush=True)
+    if server.restart:
+        os.execv(sys.executable, command)
+    return 0
@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import json
-import requests
 import logging
-import re
 from pathlib import Path
-from updateexts import UpdateExts
+from updateexts import UpdateExts, ExtRecord
 from annotate import Annotate
-from packaging.requirements import Requirement
+from metadata_cache import http_get
+import marker
+import pypi_json
+import pypi_mirror
+import pypi_simple
 
 logger = logging.getLogger()
 
@@ -16,6 +19,9 @@ __version__ = '0.1.0'
 __date__ = '2025-03-16'
 __author__ = 'John Dey'
 
+PYPI_URL = os.environ.get('EASY_UPDATE_PYPI_URL', 'https://pypi.org/pypi')
+PYPI_META = ('version', 'summary', 'classifiers')   # fields of 'info' kept in pkg['meta']
+
 
 class UpdatePython(UpdateExts, Annotate):
     """
@@ -26,17 +32,27 @@ class UpdatePython(UpdateExts, Annotate):
        - pypi projects names do not always match module names and or file names
          project: liac-arff, module: arff,  file name: liac_arff.zip
     """
-    def __init__(self, easyconfig, operation, verbose, eb):
+    def __init__(self, easyconfig, operation, verbose, eb, jobs=1):
         self.verbose = verbose
+        self.prefetcher = None
         self.pkg_dict = None
         self.dep_types = ['requires_dist']
         self.python_version = None
         self.exts_search_pypi = None
-        self.exts_processed_normalized = []
+        self.exts_processed_normalized = set()
         self.dotGraph = {}
         self.indent = "    "
         self.exts_orig = []
         self.dep_exts = []
+        self.version_specific = {}
+        if eb and eb.pyver:
+            # markers of requires_dist are evaluated for the Python version of the easyconfig
+            # and the versions of --python-versions
+            (nums) = eb.pyver.split('.')
+            self.set_python_versions(f"{nums[0]}.{nums[1]}", marker.get_python_versions())
+            logging.debug("Python Version: %s" % self.pyshortver)
+        elif marker.get_python_versions():
+            self.set_python_versions(marker.get_python_versions()[0], marker.get_python_versions()[1:])
         if operation == 'search_pypi':
             self.display_pypi_meta(easyconfig)
         elif operation == 'description':
@@ -51,16 +67,30 @@ class UpdatePython(UpdateExts, Annotate):
             Annotate.__init__(self, easyconfig, verbose, self.exts_orig, self.dep_exts)
             self.create_markdown()
         elif operation == 'update':
-            (nums) = eb.pyver.split('.')
-            self.pyshortver = f"{nums[0]}.{nums[1]}"
-            self.env = {'python_version': self.pyshortver, 'extra': 'none'}
-            logging.debug("Python Version: %s" % self.pyshortver)
-            UpdateExts.__init__(self, verbose, eb)
+            UpdateExts.__init__(self, verbose, eb, jobs)
             # Python >3.3 has additional built in modules
             self.depend_exclude = ['argparse', 'asyncio', 'typing', 'sys'
                                    'functools32', 'enum34', 'future', 'configparser']
             self.updateexts()
             eb.print_update(eb.language, self.exts_processed)
+            self.print_version_specific()
+
+    def set_python_versions(self, pyshortver, other_versions=()):
+        """ requires_dist is evaluated for pyshortver and other_versions, a dependency
+        required by any of them is added
+        """
+        self.pyshortver = pyshortver
+        self.python_versions = [pyshortver] + [ver for ver in other_versions if ver != pyshortver]
+        self.env = {'python_version': pyshortver, 'extra': 'none'}
+        self.environments = [dict(self.env, python_version=ver) for ver in self.python_versions]
+
+    def print_version_specific(self):
+        """ list the dependencies that only some of the Python versions require """
+        if not self.version_specific:
+            return
+        print(f"== dependencies required by some of Python {', '.join(self.python_versions)}")
+        for (name, dep), versions in sorted(self.version_specific.items()):
+            print(f"   {name} -> {dep}: {', '.join(versions)}")
 
     def display_pypi_meta(self, pypi_project_name):
         """ display metadata from PyPi
@@ -81,22 +111,42 @@ class UpdatePython(UpdateExts, Annotate):
     def get_pypi_project(self, pkg):
         """ Python PyPi project
         ['info']['classifiers']: 'audience', 'Topic'
+        only 'info', 'urls' and the latest release of 'releases' are read
         """
-        req = f"https://pypi.org/pypi/{pkg['name']}/json"
-        resp = requests.get(req)
+        mirror = pypi_mirror.get_mirror()
+        if mirror:
+            return mirror.get_project(pkg['name'])
+        req = f"{PYPI_URL}/{pkg['name']}/json"
+        resp = http_get(req)
         logging.debug('get_pypi_project: request: %s responce: %s', req, resp.status_code)
         if 200 <= resp.status_code < 300:
-            return resp.json()
+            return pypi_json.load_project(resp.content)
         else:
             logging.error('API error: %s GET project %s', resp.status_code, pkg['name'])
             return 'not found'
 
+    def query_metadata(self, name):
+        """ PyPI project JSON for name, used by fetch_metadata and the prefetcher.
+        With --pypi-api simple only the latest release is read from the Simple API
+        """
+        if pypi_simple.get_api() == 'simple' and not pypi_mirror.get_mirror():
+            project = pypi_simple.get_project(name)
+            if project is not None:
+                return project
+        return self.get_pypi_project({'name': name})
+
+    def metadata_requires(self, name, project):
+        """ dependency names from PyPI project JSON """
+        if project == 'not found':
+            return []
+        return self.pypi_requires_dist(name, project['info'].get('requires_dist'))
+
     def get_pypi_pkg_data(self, pkg, version=None):
         """
         return meta data from PyPi.org)
         """
-        req = 'https://pypi.org/pypi/%s/%s/json' % (pkg['name'], version)
-        resp = requests.get(req)
+        req = '%s/%s/%s/json' % (PYPI_URL, pkg['name'], version)
+        resp = http_get(req)
         if 200 < resp.status_code or resp.status_code >= 300:
             logging.error("API error: %s GET release %s", resp.status_code, pkg['name'])
             return 'not found'
@@ -112,8 +162,6 @@ class UpdatePython(UpdateExts, Annotate):
             else:
                 pkg['spec'] = {'modulename': pkg['name']}
             pkg['name'] = project['info']['name']
-        print(f"Project: {project['info']['name']} {project}")
-        sys.exit(1)
         return project
 
     def check_package_name(self, pkg_name):
@@ -148,21 +196,30 @@ class UpdatePython(UpdateExts, Annotate):
         """ process the requires_dist from Pypi. The requires_dist is a list of dependancies
          written in PEP 508 sepification.
            Evaluate each secification from requires_dist to determine if the package is required.
-              Evaluate the package with the Marker evaluator from <packaging>.
-            If the `Marker` is True, add the package name to the list of dependencies.
+              Evaluate the package with the Marker evaluator from <packaging>, for each
+              Python version in self.python_versions. Parsed requirements and marker results
+              are cached by marker.py.
+            If the `Marker` is True for any version, add the package name to the list of dependencies.
         """
         if requires_dist is None:
             return []
-        depends_on = []
-        for req in requires_dist:
-            require = Requirement(req)
-            if require.marker:
-                evaluated = require.marker.evaluate(self.env)
-                if evaluated:
-                    depends_on.append(require.name)
-                    logging.debug("from: %s add dependency: %s", name, require.name)
+        # a dependency can be listed once per marker ("foo>=1; python_version<'3.8'" and
+        # "foo>=2; python_version>='3.8'"), it is required by a version when any line is True
+        required_by = {}
+        for dep, required in marker.evaluate_requires(requires_dist, self.environments):
+            if dep in required_by:
+                required_by[dep] = [before or now for before, now in zip(required_by[dep], required)]
             else:
-                depends_on.append(require.name)
+                required_by[dep] = required
+        depends_on = []
+        for dep, required in required_by.items():
+            if not any(required):
+                continue
+            depends_on.append(dep)
+            if not all(required):
+                versions = [ver for ver, needed in zip(self.python_versions, required) if needed]
+                self.version_specific[(name, dep)] = versions
+                logging.debug("from: %s add dependency: %s for Python %s", name, dep, versions)
         return depends_on
 
     def get_pypi_release(self, pkg, project):
@@ -173,7 +230,7 @@ class UpdatePython(UpdateExts, Annotate):
         if 'version' in pkg['meta']:
             version = pkg['meta']['version']
         else:
-            print(f'no version info! for {pkg['name']}')
+            print(f"no version info! for {pkg['name']}")
         for ver in project['releases'][version]:
             if 'packagetype' in ver and ver['packagetype'] == 'sdist':
                 pkg['meta']['url'] = ver['url']
@@ -233,13 +290,13 @@ class UpdatePython(UpdateExts, Annotate):
         """get version information from pypi.  If <pkg_name> is not processed
         seach pypi. pkg_name is now case sensitive and must match
         """
-        project = self.get_pypi_project(pkg)
+        project = self.fetch_metadata(pkg['name'])
         self.project = project
         logging.debug('get_package_info: version: %s project: %s', pkg['version'], project)
 
         if self.project == 'not found':
             return 'not found'
-        pkg['meta'].update(project['info'])
+        pkg['meta'].update({key: project['info'][key] for key in PYPI_META if key in project['info']})
         # new_version = pkg['meta']['version']
         status = self.get_pypi_release(pkg, project)
         #  self.check_download_filename(pkg, project)
@@ -265,20 +322,15 @@ class UpdatePython(UpdateExts, Annotate):
 
     def processed(self, pkg):
         """ Python version - add package to exts_processed list 
-        self.exts_procsssed_normalized is a list a flat list of normalized package names
+        self.exts_procsssed_normalized is a set of normalized package names
          contains both the package name and the module name
         """
-        dup_pkg = dict(pkg)
         if pkg['action'] == 'add':
             self.ext_counter += 1
-        self.exts_processed.append(dup_pkg)
-        normalized_name = self.normalize_name(dup_pkg['name'])
-        if normalized_name != dup_pkg['name']:
-            self.exts_processed_normalized.append(normalized_name)
-        else:
-            self.exts_processed_normalized.append(dup_pkg['name'])
+        self.exts_processed.append(ExtRecord(pkg))
+        self.exts_processed_normalized.add(self.normalize_name(pkg['name']))
         if 'spec' in pkg and 'modulename' in pkg['spec']:
-            self.exts_processed_normalized.append(pkg['spec']['modulename'])
+            self.exts_processed_normalized.add(pkg['spec']['modulename'])
 
 
 
@@ -353,7 +405,7 @@ class UpdatePython(UpdateExts, Annotate):
         """Normalize a package name. PEP508 specifies that package names are case-insensitive,
         and that they should be normalized to lowercase.
         """
-        return re.sub(r"[-_.]+", "-", name).lower()
+        return pypi_simple.normalize(name)
 
 
 def add_to_python_dep_exts(dep_eb, easyconfig, dep_exts):
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
+import os
 import sys
-import requests
 import logging
 from updateexts import UpdateExts
 from annotate import Annotate
-from bioconductor_packages import Bioconductor_packages
+from cran_packages import get_cran_index
+from metadata_cache import http_get
 
 logger = logging.getLogger()
 
@@ -13,6 +14,8 @@ __version__ = '2.2.3'
 __date__ = 'March 11, 2025'
 __maintainer__ = 'John Dey jfdey@fredhutch.org'
 
+CRANDB_URL = os.environ.get('EASY_UPDATE_CRANDB_URL', 'http://crandb.r-pkg.org/')
+
 
 """
 updateR.py
@@ -25,22 +28,27 @@ easyconfig files. Automates the updating of version information for R,
 class UpdateR(UpdateExts, Annotate):
     """extend UpdateExts class to update package names from CRAN and Biocondutor
     """
-    def __init__(self, argument, operation, verbose, eb):
+    def __init__(self, argument, operation, verbose, eb, jobs=1, cran_index=None):
         self.verbose = verbose
+        self.prefetcher = None
+        self.cran = None
         self.dotGraph = {}
-        self.name = eb.name
-        self.exts_processed_normalized = []  # only used for Python packages
+        self.exts_processed_normalized = set()  # only used for Python packages
         self.depend_exclude = ['R', 'base', 'compiler', 'datasets', 'graphics',
                                'grDevices', 'grid', 'methods', 'parallel',
                                'splines', 'stats', 'stats4', 'tcltk', 'tools',
                                'utils', ]
         self.dep_types = ['Depends', 'Imports', 'LinkingTo']
-
-        self.bioc = Bioconductor_packages(eb.biocver, verbose)
         if operation == 'search_cran':
-            pass
-            #  display_cran_meta(argument)
-        elif operation == 'description':
+            self.display_cran_meta(argument)
+            return
+
+        # Bioconductor is imported here, --exts-search-cran does not need it
+        from bioconductor_packages import get_bioconductor
+        self.name = eb.name
+        # archive status is not used to update versions
+        self.bioc = get_bioconductor(eb.biocver, verbose, archive_checks=operation != 'update')
+        if operation == 'description':
             self.exts_description(eb.exts_list)
             self.printDotGraph(self.dotGraph)
         elif operation == 'annotate':
@@ -49,20 +57,52 @@ class UpdateR(UpdateExts, Annotate):
             Annotate.__init__(self, argument, verbose, self.exts_orig, self.dep_exts)
             self.create_markdown()
         elif operation == 'update':
-            UpdateExts.__init__(self, verbose, eb)
+            if cran_index:
+                self.cran = get_cran_index(cran_index, verbose)
+            UpdateExts.__init__(self, verbose, eb, jobs)
             self.updateexts()
             print(f"Total packages: {self.ext_counter}")
             eb.print_update('R', self.exts_processed)
 
+    def query_cran(self, name):
+        """ crandb metadata for package name. If the CRAN index is loaded answer from
+        the index, packages missing from the index (archived) are still found in crandb
+        """
+        if self.cran:
+            cran_info = self.cran.get_cran_package(name)
+            if cran_info != 'not found':
+                return cran_info
+        resp = http_get(CRANDB_URL + name)
+        if 200 < resp.status_code or resp.status_code >= 300:
+            return "not found"
+        return resp.json()
+
+    def query_metadata(self, name):
+        """ used by fetch_metadata and the prefetcher. Bioconductor data is already
+        in memory, only packages that are not in Bioconductor are looked up in CRAN
+        """
+        if 'Version' in self.bioc.bioc_data.get(name, {}):
+            return 'bioc'
+        return self.query_cran(name)
+
+    def metadata_requires(self, name, cran_info):
+        """ dependency names from Bioconductor or crandb metadata """
+        if cran_info == 'bioc':
+            info = self.bioc.bioc_data[name]
+            return [dep['name'] for dep_type in self.dep_types for dep in info.get(dep_type, [])]
+        if cran_info == 'not found':
+            return []
+        return [dep for dep_type in self.dep_types for dep in cran_info.get(dep_type, {})]
+
     def get_cran_package(self, pkg):
         """ MD5sum, Description, Package, releases[]
         normalize meta data from CRAN. Imports, Depends, LinkingTo are mapped to 'requires'
         """
-        cran_list = "http://crandb.r-pkg.org/"
-        resp = requests.get(url=cran_list + pkg['name'])
-        if 200 < resp.status_code or resp.status_code >= 300:
+        cran_info = self.fetch_metadata(pkg['name'])
+        if cran_info == 'bioc':
+            cran_info = self.query_cran(pkg['name'])
+        if cran_info == 'not found':
             return "not found"
-        cran_info = resp.json()
         pkg['info'] = cran_info
         if cran_info['Version'] != pkg['version']:
             pkg['orig_version'] = pkg['version']
@@ -89,11 +129,10 @@ class UpdateR(UpdateExts, Annotate):
         --search-cran <pkg_name>
         """
         print("Search CRAN for %s" % pkg_name)
-        pkg = {'name': pkg_name, 'version': ""}
-        status = self.get_cran_package(pkg)
-        if status == 'not found':
+        cran_info = self.query_cran(pkg_name)
+        if cran_info == 'not found':
             sys.exit(1)
-        self.print_meta(pkg['pkg_name']['info'])
+        self.print_meta(cran_info)
 
     def print_depends(self, pkg):
         """ used for debugging """
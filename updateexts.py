@@ -7,48 +7,122 @@
    Python and bundles that extend R and Python. Package version information
 """
 
+import time
 import logging
+from prefetch import Prefetcher
+from profiler import phase, package
 logger = logging.getLogger()
 
 __version__ = '2.0.7'
 __maintainer__ = 'John Dey jfdey@fredhutch.org'
 __date__ = 'Aug 15, 2019'
 
+# metadata kept in the processed record, the rest of the PyPI/CRAN info is dropped
+RECORD_META = ('requires', 'description', 'filename')
+
+
+class ExtRecord:
+    """ processed extension saved in exts_processed.
+    Fields are read and written like the package dictionary: record['name'],
+    'action' in record. pkg['from'] is stored as from_pkg.
+    """
+    __slots__ = ('name', 'version', 'orig_version', 'action', 'from_pkg', 'spec', 'meta', 'level')
+    keys = {'from': 'from_pkg'}
+
+    def __init__(self, pkg):
+        for key, value in pkg.items():
+            if key == 'meta':
+                value = {item: value[item] for item in RECORD_META if item in value}
+            attr = self.keys.get(key, key)
+            if attr in self.__slots__:
+                setattr(self, attr, value)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.keys.get(key, key))
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, self.keys.get(key, key), value)
+
+    def __contains__(self, key):
+        return hasattr(self, self.keys.get(key, key))
+
+    def get(self, key, default=None):
+        return getattr(self, self.keys.get(key, key), default)
+
+    def __repr__(self):
+        fields = {key: getattr(self, key) for key in self.__slots__ if hasattr(self, key)}
+        return f"ExtRecord({fields})"
+
 
 class UpdateExts:
     """
     """
-    def __init__(self, verbose, eb):
+    def __init__(self, verbose, eb, jobs=1):
         """
+        jobs > 1 prefetches metadata for the dependency tree with a thread pool
         """
         self.verbose = verbose
+        self.jobs = jobs
+        self.prefetcher = None
         self.language = eb.language
         self.ext_counter = 0
         self.pkg_updated = 0
         self.pkg_new = 0
         self.pkg_duplicate = 0
         self.pkg_reordered = 0
+        self.pkg_failed = 0
         self.indent_n = 4
         self.indent = ' ' * self.indent_n
         self.ext_list_len = 1
         self.dep_exts = eb.dep_exts
-        self.checking = list()  # prevent infinite loops while resolving dependencies
+        self.in_progress = set()  # packages being resolved, prevents infinite loops
+        self.resolving = list()   # the same names in resolving order, to report cycles
+        self.cycles = list()
+        self.moved = set()        # normalized names moved ahead of their place in exts_list
+        self.exts_later = dict()  # normalized name: exts_list entry, not visited yet
         self.exts_processed = list()
         self.exts_orig = eb.exts_list
         self.interpolate = {'name': eb.name, 'namelower': eb.name.lower(),
                             'version': eb.version}
         self.name = eb.name
         self.version = eb.version
-        self.dep_exts_list = [sub_list[0] for sub_list in self.dep_exts]
+        self.dep_exts_names = {sub_list[0] for sub_list in self.dep_exts}
+
+    def fetch_metadata(self, name):
+        """ return metadata for package name from the prefetcher if one is running,
+        otherwise query the package authority directly.
+        query_metadata() and metadata_requires() are provided by the language classes.
+        """
+        if self.prefetcher:
+            return self.prefetcher.get(name)
+        return self.query_metadata(name)
+
+    @phase('prefetch')
+    def prefetch_exts(self):
+        """ concurrently fetch metadata for every package in exts_list and all of
+        their dependencies. The serial walk in check_package then answers from memory,
+        so exts_processed is identical to a run without prefetching.
+        """
+        start = time.time()
+        names = [ext[0] % self.interpolate for ext in self.exts_orig if isinstance(ext, tuple)]
+        exclude = set(self.depend_exclude) | self.dep_exts_names
+        self.prefetcher = Prefetcher(self.query_metadata, self.metadata_requires,
+                                     self.jobs, exclude)
+        count = self.prefetcher.walk(names)
+        if self.verbose:
+            print(f"== prefetched {count} packages with {self.jobs} jobs in {time.time() - start:.1f}s")
 
     def processed(self, pkg):
         """
             Save package name to list of Processed packages.
         """
-        dup_pkg = dict(pkg)
         if pkg['action'] == 'add':
             self.ext_counter += 1
-        self.exts_processed.append(dup_pkg)
+        self.exts_processed.append(ExtRecord(pkg))
+        self.exts_processed_normalized.add(self.normalize_name(pkg['name']))
 
     def print_status(self, pkg):
         """ print one line status for each package if --verbose
@@ -78,36 +152,84 @@ class UpdateExts:
 
         input: pkg{}
         check that all dependencies are meet for each package.
-        check_package can be called recursively.
-        pkg['from'] is used to track recursion.
+        Dependencies are resolved depth first with an explicit stack, each package is
+        saved after everything it requires, so exts_processed is in dependency order.
+        Packages are visited in exts_list order, the order only changes where a
+        package requires one that is listed later.
+        pkg['from'] is used to track dependencies.
           - None module is from source file
           - not None:  Name of package that depends from
         pkg['action'] What action will be take to exts_list.
-          - 'add'; new package
+          - 'add'; new package, or a package moved ahead of the package requiring it
           - 'keep'; no update required
           - 'update'; version change
           - 'processed' package appears twice
           - 'deplicate' package is a dependency of another package
           - 'remove' not compatible, wrong OS, not supported version
         """
+        if not self.start_package(pkg):
+            return
+        stack = [(pkg, iter(pkg['meta'].get('requires') or []))]
+        while stack:
+            pkg, requires = stack[-1]
+            for depend, method in requires:
+                if depend in self.depend_exclude:
+                    continue
+                dep_pkg = {'name': depend,
+                           'from': [pkg['name'], method],
+                           'version': 'x',
+                           'spec': {}, 'meta': {}, 'level': pkg['level']+1}
+                if self.start_package(dep_pkg):
+                    stack.append((dep_pkg, iter(dep_pkg['meta'].get('requires') or [])))
+                    break
+            else:
+                stack.pop()
+                self.resolving.pop()
+                self.in_progress.discard(pkg['name'])
+                self.processed(pkg)
+                if self.verbose:
+                    self.print_status(pkg)
+
+    def start_package(self, pkg):
+        """ get the metadata for pkg and set its action.
+        Returns True if the dependencies of pkg have to be resolved
+        """
         logging.debug('check_package: %s from: %s', pkg['name'], pkg['from'])
         if self.is_processed(pkg):
-            return
-        status = self.get_package_info(pkg)
+            return False
+        moved = False
+        if pkg['from']:
+            ext = self.exts_later.get(self.normalize_name(pkg['name']))
+            if ext:
+                # listed later in exts_list, move it here with its version and options
+                moved = True
+                pkg['version'] = ext[1] % self.interpolate
+                if len(ext) > 2:
+                    pkg['spec'] = dict(ext[2])
+        with package(pkg['name']):
+            status = self.get_package_info(pkg)
         if status in ["error", 'not found']:
+            self.pkg_failed += 1
             if pkg['from'] is None:
                 pkg['action'] = 'keep'
                 self.processed(pkg)
-                return
             else:
                 logging.warning(" Warning: %s is dependency from %s, but can't be found!",
                                 pkg['name'], pkg['from'])
-                return
+            return False
 
         if pkg['from']:
             pkg['action'] = 'add'
-            self.pkg_new += 1
             self.ext_counter += 1
+            if moved:
+                self.moved.add(self.normalize_name(pkg['name']))
+                self.pkg_reordered += 1
+                if pkg['orig_version'] is not None:
+                    pkg['spec'].pop('checksums', None)
+                if self.language == 'Python':
+                    self.check_download_filename(pkg)
+            else:
+                self.pkg_new += 1
         else:
             if pkg['orig_version'] is None:
                 pkg['action'] = 'keep'
@@ -118,58 +240,61 @@ class UpdateExts:
                     if 'checksums' in pkg[2]:
                         del pkg[2]['checksums']
         if 'requires' in pkg['meta'] and pkg['meta']['requires'] is not None:
-            self.checking.append(pkg['name'])
             logging.debug('%s: requires: %s', pkg['name'], pkg['meta']['requires'])
-            for depend, method in pkg['meta']['requires']:
-                if depend not in self.depend_exclude:
-                    dep_pkg = {'name': depend,
-                               'from': [pkg['name'], method],
-                               'version': 'x',
-                               'spec': {}, 'meta': {}, 'level': pkg['level']+1}
-                    self.check_package(dep_pkg)
-        self.processed(pkg)
-        if self.verbose:
-            self.print_status(pkg)
+        self.in_progress.add(pkg['name'])
+        self.resolving.append(pkg['name'])
+        return True
 
     def is_processed(self, pkg):
         """ 
         check if package has been previously processed
         if package exists AND is in the original exts_lists Mark as 'duplicate'
         if package exists AND is in the exts_processed list Mark as 'processed'
+        a package that requires a package that is still being resolved is a cycle,
+        the cycle is reported and the requirement is not followed
         """
         action = None
         name = pkg['name']
         normalized_name = self.normalize_name(name)
-        if name in self.dep_exts_list:
+        if name in self.dep_exts_names:
             action = 'duplicate'
-        elif normalized_name in self.exts_processed or (normalized_name in self.exts_processed_normalized):
+        elif normalized_name in self.exts_processed_normalized:
             action = 'processed'
 
-        if not action and name in self.checking:
-            action = 'reordered'
-            self.pkg_reordered += 1
+        if not action and name in self.in_progress:
+            cycle = self.resolving[self.resolving.index(name):] + [name]
+            self.cycles.append(cycle)
+            logging.warning('dependency cycle: %s', ' -> '.join(cycle))
+            return True
         if action:
             if pkg['from'] is None:
                 pkg['action'] = action
-                self.pkg_duplicate += 1
+                if normalized_name not in self.moved:
+                    self.pkg_duplicate += 1
                 self.ext_counter -= 1
-                pkg['action'] = action
                 if self.verbose:
                     self.print_status(pkg)
             return True
         else:
             return False
 
+    @phase('updateexts')
     def updateexts(self):
         """Loop through exts_list and check which packages need to be updated.
         this is an external method for the class
         """
         print(f"== Updating {self.language} extensions for {self.name} {self.version}")
         self.ext_list_len = len(self.exts_orig)
+        if self.jobs > 1:
+            self.prefetch_exts()
+        for ext in reversed(self.exts_orig):
+            if isinstance(ext, tuple):
+                self.exts_later[self.normalize_name(ext[0] % self.interpolate)] = ext
         for ext in self.exts_orig:
             self.ext_counter += 1
             if isinstance(ext, tuple):
                 name = ext[0] % self.interpolate
+                self.exts_later.pop(self.normalize_name(name), None)
                 version = ext[1] % self.interpolate
                 pkg = {'name': name, 'version': version,
                        'from': None,
@@ -186,6 +311,9 @@ class UpdateExts:
                 self.check_download_filename(pkg)
             if pkg['action'] in ['processed', 'duplicate', 'reordered']:
                 self.processed(pkg)
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+            self.prefetcher = None
 
         if self.verbose:
             self.stats()
@@ -206,4 +334,8 @@ class UpdateExts:
         print(f"== New Packages: {self.pkg_new}")
         print(f"== Dropped Packages: {self.pkg_duplicate}")
         print(f"== Reordered Packages: {self.pkg_reordered}")
+        print(f"== Not Found Packages: {self.pkg_failed}")
+        print(f"== Dependency Cycles: {len(self.cycles)}")
+        for cycle in self.cycles:
+            print(f"   {' -> '.join(cycle)}")
         print(f"== Total Packages: {self.ext_list_len}")